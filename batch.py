@@ -0,0 +1,201 @@
+"""Vectorized EnhancedPatternAI for many simultaneous matches.
+
+Each session's state lives in a row of a set of NumPy arrays (moves are
+coded 0..N-1 in the order of the game's rules.Rules moves, classic
+Rock-Paper-Scissors by default) and every strategy, the weight update and
+the ensemble vote run across all sessions at once. It plays every
+EnhancedPatternAI strategy except sequence_match. The Markov tables take
+N**3 and N**4 counters per session for N moves. Requires numpy, which the
+pygame game itself does not need.
+"""
+import numpy as np
+
+from engine import EXPLOIT_RATE, STRATEGY_WEIGHTS, WEIGHT_FLOOR, WEIGHT_SCALE
+from rules import RPS
+
+STRATEGY_NAMES = ('frequency', 'anti_frequency', 'alternating', 'repeating', 'cycle', 'reactive',
+                  'markov_2', 'markov_3', 'random')
+INITIAL_WEIGHTS = tuple(STRATEGY_WEIGHTS[name] for name in STRATEGY_NAMES)
+
+NO_MOVE = -1
+MAX_MOVES = 127  # Move codes are int8
+FREQUENCY_WINDOW = 15
+LOOKBACK = 10  # Moves gathered per round; enough for a 5-move cycle checked twice
+
+FREQ, ANTI_FREQ, ALTERNATING, REPEATING, CYCLE, REACTIVE, MARKOV_2, MARKOV_3, RANDOM = range(len(STRATEGY_NAMES))
+
+
+def encode_moves(moves, rules=RPS):
+    """Convert move names (or None for no move) to an int8 code array"""
+    return np.array([NO_MOVE if m is None else rules.index[m] for m in moves], dtype=np.int8)
+
+
+def decode_moves(codes, rules=RPS):
+    return [rules.moves[c] for c in codes]
+
+
+class BatchPatternAI:
+    """Runs the EnhancedPatternAI strategies for n_sessions matches in lockstep.
+
+    Per round call step() with every session's latest player move (NO_MOVE
+    for sessions without a new move) and get back every session's next AI
+    move. Ties in a vote or a count go to the lower move code.
+    """
+    def __init__(self, n_sessions, history_size=50, seed=None, rules=RPS):
+        if history_size <= FREQUENCY_WINDOW:
+            raise ValueError(f"history_size must be greater than {FREQUENCY_WINDOW}")
+        if rules.size > MAX_MOVES:
+            raise ValueError(f"BatchPatternAI supports at most {MAX_MOVES} moves")
+        self.n_sessions = n_sessions
+        self.history_size = history_size
+        self.rng = np.random.default_rng(seed)
+        self.rules = rules
+        self.n_moves = m = rules.size
+        self.counter = np.array(rules.counter_index, dtype=np.int8)  # Move code that beats each move code
+
+        n, s = n_sessions, len(STRATEGY_NAMES)
+        self.history = np.zeros((n, history_size), dtype=np.int8)  # Ring buffer per session
+        self.length = np.zeros(n, dtype=np.int64)  # Moves seen so far
+        self.window_counts = np.zeros((n, m), dtype=np.int32)  # Last FREQUENCY_WINDOW moves
+        # Transition counts over the history window, flattened (context..., next)
+        self.markov_2 = np.zeros((n, m ** 3), dtype=np.int32)
+        self.markov_3 = np.zeros((n, m ** 4), dtype=np.int32)
+        self.weight = np.empty((n, s), dtype=np.float64)
+        self.success = np.zeros((n, s), dtype=np.int32)
+        self.attempts = np.zeros((n, s), dtype=np.int32)
+        self.last_prediction = np.full(n, NO_MOVE, dtype=np.int8)
+        self.last_method = np.full(n, NO_MOVE, dtype=np.int8)
+        self.weight[:] = INITIAL_WEIGHTS
+
+    def reset_sessions(self, sessions):
+        """Clear the state of the given session indices so they can host new matches"""
+        self.length[sessions] = 0
+        self.window_counts[sessions] = 0
+        self.markov_2[sessions] = 0
+        self.markov_3[sessions] = 0
+        self.weight[sessions] = INITIAL_WEIGHTS
+        self.success[sessions] = 0
+        self.attempts[sessions] = 0
+        self.last_prediction[sessions] = NO_MOVE
+        self.last_method[sessions] = NO_MOVE
+
+    def _moves_at(self, sessions, positions):
+        return self.history[sessions, positions % self.history_size].astype(np.int64)
+
+    def observe(self, moves):
+        """Record each session's latest player move and update strategy stats"""
+        moves = np.asarray(moves)
+        m = self.n_moves
+        sessions = np.flatnonzero(moves >= 0)
+        move = moves[sessions].astype(np.int64)
+        t = self.length[sessions]
+
+        # Update success rate for last prediction
+        scored = self.last_prediction[sessions] >= 0
+        s_sessions = sessions[scored]
+        method = self.last_method[s_sessions].astype(np.int64)
+        self.success[s_sessions, method] += move[scored] == self.last_prediction[s_sessions]
+        self.attempts[s_sessions, method] += 1
+        attempts = self.attempts[s_sessions, method]
+        ready = attempts >= 3
+        rate = self.success[s_sessions, method][ready] / attempts[ready]
+        self.weight[s_sessions[ready], method[ready]] = np.maximum(WEIGHT_FLOOR, rate * WEIGHT_SCALE)
+
+        # Drop the n-grams starting at the move leaving the history window;
+        # its ring slot is overwritten by the new move below
+        full = t >= self.history_size
+        e_sessions, e = sessions[full], t[full] - self.history_size
+        a, b, c, d = (self._moves_at(e_sessions, e + i) for i in range(4))
+        self.markov_2[e_sessions, (a * m + b) * m + c] -= 1
+        self.markov_3[e_sessions, ((a * m + b) * m + c) * m + d] -= 1
+
+        # Slide the frequency window
+        sliding = t >= FREQUENCY_WINDOW
+        f_sessions = sessions[sliding]
+        self.window_counts[f_sessions, self._moves_at(f_sessions, t[sliding] - FREQUENCY_WINDOW)] -= 1
+        self.window_counts[sessions, move] += 1
+
+        # Add the n-grams ending at the new move
+        k2 = t >= 2
+        k2_sessions, k2_t = sessions[k2], t[k2]
+        a, b = self._moves_at(k2_sessions, k2_t - 2), self._moves_at(k2_sessions, k2_t - 1)
+        self.markov_2[k2_sessions, (a * m + b) * m + move[k2]] += 1
+        k3 = t >= 3
+        k3_sessions, k3_t = sessions[k3], t[k3]
+        a, b, c = (self._moves_at(k3_sessions, k3_t - i) for i in (3, 2, 1))
+        self.markov_3[k3_sessions, ((a * m + b) * m + c) * m + move[k3]] += 1
+
+        self.history[sessions, t % self.history_size] = move
+        self.length[sessions] = t + 1
+
+    def predict_all(self):
+        """Return an (n_sessions, n_strategies) array of predicted player moves (NO_MOVE if none)"""
+        n, m = self.n_sessions, self.n_moves
+        rows = np.arange(n)
+        length = self.length
+        # recent[:, j] is the move j+1 steps back (recent[:, 0] is the last move)
+        back = np.arange(1, LOOKBACK + 1)
+        recent = self.history[rows[:, None], (length[:, None] - back) % self.history_size]
+
+        predictions = np.full((n, len(STRATEGY_NAMES)), NO_MOVE, dtype=np.int8)
+
+        has_3 = length >= 3
+        counts = self.window_counts
+        predictions[:, FREQ] = np.where(has_3, counts.argmax(axis=1), NO_MOVE)
+        present = np.where(counts > 0, counts, np.iinfo(np.int32).max)
+        predictions[:, ANTI_FREQ] = np.where(has_3, present.argmin(axis=1), NO_MOVE)
+
+        # ABAB, then ABCABC
+        alt_2 = ((length >= 4) & (recent[:, 3] == recent[:, 1]) & (recent[:, 2] == recent[:, 0])
+                 & (recent[:, 3] != recent[:, 2]))
+        alt_3 = ((length >= 6) & (recent[:, 5] == recent[:, 2]) & (recent[:, 4] == recent[:, 1])
+                 & (recent[:, 3] == recent[:, 0])
+                 & ~((recent[:, 5] == recent[:, 4]) & (recent[:, 4] == recent[:, 3])))
+        predictions[:, ALTERNATING] = np.where(alt_2, recent[:, 3], np.where(alt_3, recent[:, 5], NO_MOVE))
+
+        predictions[:, REPEATING] = np.where((length >= 2) & (recent[:, 0] == recent[:, 1]), recent[:, 0], NO_MOVE)
+
+        # Shortest of the 3, 4 and 5 move cycles wins
+        cycle = np.full(n, NO_MOVE, dtype=np.int8)
+        for cycle_length in (5, 4, 3):
+            first = recent[:, 2 * cycle_length - 1:cycle_length - 1:-1]
+            second = recent[:, cycle_length - 1::-1]
+            found = (length >= 6) & (length >= cycle_length * 2) & (first == second).all(axis=1)
+            cycle = np.where(found, recent[:, cycle_length - 1], cycle)  # Continue the cycle
+        predictions[:, CYCLE] = cycle
+
+        predictions[:, REACTIVE] = np.where(length >= 2, recent[:, 0], NO_MOVE)
+
+        context = recent[:, 1].astype(np.int64) * m + recent[:, 0]
+        row = self.markov_2.reshape(n, m * m, m)[rows, context]
+        predictions[:, MARKOV_2] = np.where((length >= 3) & (row.sum(axis=1) > 0), row.argmax(axis=1), NO_MOVE)
+        context = context + recent[:, 2].astype(np.int64) * m * m
+        row = self.markov_3.reshape(n, m ** 3, m)[rows, context]
+        predictions[:, MARKOV_3] = np.where((length >= 4) & (row.sum(axis=1) > 0), row.argmax(axis=1), NO_MOVE)
+
+        predictions[:, RANDOM] = self.rng.integers(0, m, n)
+        return predictions
+
+    def choose(self):
+        """Pick every session's next AI move (int8 codes) from the weighted ensemble"""
+        n = self.n_sessions
+        predictions = self.predict_all()
+
+        # Weighted vote: votes[i, m] = sum of weights of strategies predicting m
+        match = predictions[:, :, None] == np.arange(self.n_moves)
+        votes = (match * self.weight[:, :, None]).sum(axis=1)
+        predicted = votes.argmax(axis=1)
+        first_method = (predictions == predicted[:, None]).argmax(axis=1)
+
+        # Use weighted prediction 85% of the time once there are 2 moves
+        exploit = (self.length >= 2) & (self.rng.random(n) < EXPLOIT_RATE)
+        self.last_prediction[exploit] = predicted[exploit]
+        self.last_method[exploit] = first_method[exploit]
+
+        random_moves = self.rng.integers(0, self.n_moves, n)
+        return np.where(exploit, self.counter[predicted], random_moves).astype(np.int8)
+
+    def step(self, moves):
+        """Record the sessions' latest moves and return their next AI moves"""
+        self.observe(moves)
+        return self.choose()
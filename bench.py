@@ -0,0 +1,169 @@
+"""Latency and throughput benchmarks for the AI's per-round work.
+
+Times every predict_* strategy, the get_weighted_prediction ensemble,
+add_move and a full round (get_ai_choice + add_move) at several history
+lengths, plus the ensemble with only its first k strategies enabled
+(ensemble_k) to show how the cost grows with the number of strategies.
+Moves come from a seeded stream so runs are comparable across commits.
+Results are written as JSON with one record per (history_size,
+operation) so two runs can be diffed or compared:
+
+    python bench.py --output before.json
+    python bench.py --output after.json --compare before.json
+"""
+import argparse
+import gc
+import inspect
+import json
+import platform
+import random
+import sys
+import time
+
+from engine import MOVES, EnhancedPatternAI
+from rng import BlockRNG
+
+DEFAULT_HISTORY_SIZES = (50, 200, 1000, 5000)
+
+
+def move_stream(seed, length):
+    """Seeded mix of repeated patterns and noise, like a human player"""
+    rng = random.Random(seed)
+    moves = []
+    while len(moves) < length:
+        pattern = [rng.choice(MOVES) for _ in range(rng.randint(1, 6))]
+        for _ in range(rng.randint(2, 8)):
+            moves.extend(m if rng.random() < 0.8 else rng.choice(MOVES) for m in pattern)
+    return moves[:length]
+
+
+def strategy_methods(ai):
+    """All no-argument predict_* methods of the AI, in definition order"""
+    return [name for name in vars(type(ai))
+            if name.startswith('predict_') and not inspect.signature(getattr(ai, name)).parameters]
+
+
+def percentile(sorted_samples, fraction):
+    return sorted_samples[min(len(sorted_samples) - 1, int(fraction * len(sorted_samples)))]
+
+
+def summarize(samples):
+    samples.sort()
+    total = sum(samples)
+    return {
+        'p50_ns': percentile(samples, 0.50),
+        'p99_ns': percentile(samples, 0.99),
+        'max_ns': samples[-1],
+        'mean_ns': total / len(samples),
+        'ops_per_s': len(samples) / total * 1e9 if total else 0.0,
+    }
+
+
+def bench_operation(history_size, operation, stream, rounds, seed):
+    """Time one operation per round over rounds rounds after warming up the history"""
+    ai = EnhancedPatternAI(history_size=history_size, rng=BlockRNG(seed))
+    for move in stream[:history_size]:
+        ai.add_move(move)
+
+    if operation.startswith('ensemble_'):
+        for name in list(ai.registry)[int(operation[len('ensemble_'):]):]:
+            ai.disable_strategy(name)
+        operation = 'get_weighted_prediction'
+    call = ai.get_ai_choice if operation == 'round' else getattr(ai, operation)
+    clock = time.perf_counter_ns
+    samples = []
+    gc.disable()
+    try:
+        for move in stream[history_size:history_size + rounds]:
+            if operation == 'add_move':
+                start = clock()
+                ai.add_move(move)
+                samples.append(clock() - start)
+            elif operation == 'round':
+                start = clock()
+                call()
+                ai.add_move(move)
+                samples.append(clock() - start)
+            else:
+                start = clock()
+                call()
+                samples.append(clock() - start)
+                ai.add_move(move)
+    finally:
+        gc.enable()
+    return summarize(samples)
+
+
+def run_benchmarks(history_sizes=DEFAULT_HISTORY_SIZES, rounds=2000, seed=0, repeat=3):
+    operations = strategy_methods(EnhancedPatternAI()) + ['get_weighted_prediction', 'add_move', 'round']
+    stream = move_stream(seed, max(history_sizes) + rounds)
+    records = []
+    jobs = [(history_size, operation) for history_size in history_sizes for operation in operations]
+    # Strategy-count sweep at the smallest history size
+    jobs += [(min(history_sizes), f"ensemble_{k}") for k in range(1, len(EnhancedPatternAI().registry) + 1)]
+    for history_size, operation in jobs:
+        record = {'history_size': history_size, 'operation': operation}
+        # Keep the quietest of several runs to damp scheduler noise
+        runs = [bench_operation(history_size, operation, stream, rounds, seed) for _ in range(repeat)]
+        record.update(min(runs, key=lambda run: run['p50_ns']))
+        records.append(record)
+    return {
+        'meta': {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+                 'machine': platform.machine(), 'seed': seed, 'rounds': rounds, 'repeat': repeat},
+        'results': records,
+    }
+
+
+def compare(report, baseline, threshold):
+    """Print p50 ratios against a baseline report; return the regressed keys"""
+    old = {(r['history_size'], r['operation']): r for r in baseline['results']}
+    regressions = []
+    print(f"{'history':>8} {'operation':<26}{'old p50':>10}{'new p50':>10}{'ratio':>8}")
+    for record in report['results']:
+        key = (record['history_size'], record['operation'])
+        if key not in old:
+            continue
+        ratio = record['p50_ns'] / old[key]['p50_ns'] if old[key]['p50_ns'] else float('inf')
+        flag = "  REGRESSION" if ratio > threshold else ""
+        if flag:
+            regressions.append(key)
+        print(f"{key[0]:>8} {key[1]:<26}{old[key]['p50_ns']:>10}{record['p50_ns']:>10}{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def format_report(report):
+    lines = [f"{'history':>8} {'operation':<26}{'p50 ns':>10}{'p99 ns':>10}{'ops/s':>12}"]
+    for r in report['results']:
+        lines.append(f"{r['history_size']:>8} {r['operation']:<26}{r['p50_ns']:>10}{r['p99_ns']:>10}{r['ops_per_s']:>12,.0f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--history-sizes', default=",".join(map(str, DEFAULT_HISTORY_SIZES)))
+    parser.add_argument('--rounds', type=int, default=2000, help="timed rounds per operation")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help="runs per operation; the lowest p50 is kept")
+    parser.add_argument('--output', help="write the JSON report to this file")
+    parser.add_argument('--compare', help="baseline JSON report to compare p50 latencies against")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="p50 ratio above which an operation counts as a regression")
+    args = parser.parse_args()
+
+    history_sizes = [int(size) for size in args.history_sizes.split(",")]
+    report = run_benchmarks(history_sizes, args.rounds, args.seed, args.repeat)
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
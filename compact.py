@@ -0,0 +1,197 @@
+"""Memory-compact EnhancedPatternAI for hosting very many sessions.
+
+CompactPatternAI plays the nine fixed-memory strategies of
+engine.EnhancedPatternAI (all but sequence_match) but keeps a session in
+a handful of flat arrays: moves are small ints (the index into the
+game's rules.Rules moves, classic Rock-Paper-Scissors by default), the
+history is a fixed ring buffer and the strategy stats are parallel arrays
+in STRATEGY_NAMES order. The Markov tables take N**3 and N**4 counters
+for N moves.
+
+Run this module to print the measured bytes per session of both classes.
+"""
+import random
+import tracemalloc
+from array import array
+
+from engine import EXPLOIT_RATE, MOVES, STRATEGY_WEIGHTS, WEIGHT_FLOOR, WEIGHT_SCALE, EnhancedPatternAI
+from rules import RPS
+
+MAX_MOVES = 127  # Move codes are stored as signed bytes
+STRATEGY_NAMES = ('frequency', 'anti_frequency', 'alternating', 'repeating', 'cycle', 'reactive',
+                  'markov_2', 'markov_3', 'random')
+FREQUENCY_WINDOW = 15
+NO_MOVE = -1
+
+(FREQ, ANTI_FREQ, ALTERNATING, REPEATING, CYCLE, REACTIVE,
+ MARKOV_2, MARKOV_3, RANDOM) = range(len(STRATEGY_NAMES))
+
+# Shared zero-filled templates that new sessions copy from
+_EMPTY_WEIGHTS = array('d', (STRATEGY_WEIGHTS[name] for name in STRATEGY_NAMES))
+_EMPTY_STATS = array('I', bytes(4 * len(STRATEGY_NAMES)))
+
+
+class CompactPatternAI:
+    """EnhancedPatternAI with integer moves, a ring buffer and flat stat arrays.
+
+    Ties in a count or a vote go to the lower move code.
+    """
+    __slots__ = ('history_size', 'history', 'length', 'window_counts', 'markov_2', 'markov_3',
+                 'weights', 'success', 'attempts', 'last_prediction', 'last_method', 'rng', 'rules')
+
+    def __init__(self, history_size=50, rng=None, rules=RPS):
+        if not FREQUENCY_WINDOW < history_size < 65536:
+            raise ValueError(f"history_size must be between {FREQUENCY_WINDOW + 1} and 65535")
+        if rules.size > MAX_MOVES:
+            raise ValueError(f"CompactPatternAI supports at most {MAX_MOVES} moves")
+        n = rules.size
+        self.rules = rules  # Shared, so it costs a session nothing
+        self.history_size = history_size
+        self.history = array('b', bytes(history_size))  # Ring buffer of move codes
+        self.length = 0  # Moves seen so far
+        self.window_counts = array('B', bytes(n))  # Last FREQUENCY_WINDOW moves
+        # Transition counts over the history window, indexed (context..., next)
+        self.markov_2 = array('H', bytes(2 * n ** 3))
+        self.markov_3 = array('H', bytes(2 * n ** 4))
+        self.weights = array('d', _EMPTY_WEIGHTS)
+        self.success = array('I', _EMPTY_STATS)
+        self.attempts = array('I', _EMPTY_STATS)
+        self.last_prediction = NO_MOVE
+        self.last_method = NO_MOVE
+        # Shares the random module unless given its own BlockRNG (which costs a few KB a session)
+        self.rng = rng or random
+
+    def _back(self, steps):
+        """Move code played the given number of steps back (1 is the last move)"""
+        return self.history[(self.length - steps) % self.history_size]
+
+    def add_move(self, move):
+        self.add_code(self.rules.index[move])
+
+    def add_code(self, code):
+        """Add a move code to history and update strategy success rates"""
+        t = self.length
+        history, size = self.history, self.history_size
+        n = self.rules.size
+
+        # Update success rate for last prediction
+        method = self.last_method
+        if method != NO_MOVE:
+            if code == self.last_prediction:
+                self.success[method] += 1
+            self.attempts[method] += 1
+            if self.attempts[method] >= 3:
+                self.weights[method] = max(WEIGHT_FLOOR, self.success[method] / self.attempts[method] * WEIGHT_SCALE)
+
+        # Drop the n-grams starting at the move leaving the history window
+        if t >= size:
+            a, b, c, d = (history[(t - size + i) % size] for i in range(4))
+            self.markov_2[(a * n + b) * n + c] -= 1
+            self.markov_3[((a * n + b) * n + c) * n + d] -= 1
+
+        if t >= FREQUENCY_WINDOW:
+            self.window_counts[history[(t - FREQUENCY_WINDOW) % size]] -= 1
+        self.window_counts[code] += 1
+
+        # Add the n-grams ending at the new move
+        if t >= 2:
+            context = self._back(2) * n + self._back(1)
+            self.markov_2[context * n + code] += 1
+            if t >= 3:
+                self.markov_3[(self._back(3) * n * n + context) * n + code] += 1
+
+        history[t % size] = code
+        self.length = t + 1
+
+    def _most_common(self, counts, offset=0):
+        best = NO_MOVE
+        for code in range(self.rules.size):
+            if counts[offset + code] and (best == NO_MOVE or counts[offset + code] > counts[offset + best]):
+                best = code
+        return best
+
+    def predict_all(self):
+        """Predicted player move code per strategy (NO_MOVE if it has none)"""
+        length = self.length
+        n = self.rules.size
+        predictions = [NO_MOVE] * len(STRATEGY_NAMES)
+        if length < 2:
+            return predictions
+        recent = [self._back(j) for j in range(1, min(length, 10) + 1)]
+
+        if length >= 3:
+            counts = self.window_counts
+            predictions[FREQ] = self._most_common(counts)
+            least = NO_MOVE
+            for code in range(n):
+                if counts[code] and (least == NO_MOVE or counts[code] < counts[least]):
+                    least = code
+            predictions[ANTI_FREQ] = least
+
+        if length >= 4 and recent[3] == recent[1] and recent[2] == recent[0] and recent[3] != recent[2]:
+            predictions[ALTERNATING] = recent[3]
+        elif (length >= 6 and recent[5] == recent[2] and recent[4] == recent[1] and recent[3] == recent[0]
+              and not recent[5] == recent[4] == recent[3]):
+            predictions[ALTERNATING] = recent[5]
+
+        if recent[0] == recent[1]:
+            predictions[REPEATING] = recent[0]
+
+        for cycle_length in (3, 4, 5):
+            if length >= cycle_length * 2 and all(recent[j] == recent[j + cycle_length] for j in range(cycle_length)):
+                predictions[CYCLE] = recent[cycle_length - 1]  # Continue the cycle
+                break
+
+        predictions[REACTIVE] = recent[0]
+
+        if length >= 3:
+            context = recent[1] * n + recent[0]
+            predictions[MARKOV_2] = self._most_common(self.markov_2, context * n)
+            if length >= 4:
+                predictions[MARKOV_3] = self._most_common(self.markov_3, (recent[2] * n * n + context) * n)
+
+        predictions[RANDOM] = self.rng.randrange(n)
+        return predictions
+
+    def get_weighted_prediction(self):
+        """Weighted ensemble vote; returns (predicted move code, strategy index)"""
+        votes = [0.0] * self.rules.size
+        predictions = self.predict_all()
+        for method, prediction in enumerate(predictions):
+            if prediction != NO_MOVE:
+                votes[prediction] += self.weights[method]
+        predicted = max(range(len(votes)), key=votes.__getitem__)
+        self.last_prediction = predicted
+        self.last_method = predictions.index(predicted)
+        return predicted, self.last_method
+
+    def get_ai_code(self):
+        if self.length >= 2 and self.rng.random() < EXPLOIT_RATE:
+            predicted, method = self.get_weighted_prediction()
+            return self.rules.counter_index[predicted]  # Move that beats the prediction
+        return self.rng.randrange(self.rules.size)
+
+    def get_ai_choice(self):
+        return self.rules.moves[self.get_ai_code()]
+
+
+def measure_session_bytes(factory, sessions=2000, rounds=200, seed=0):
+    """Average bytes allocated per live session after playing rounds moves each"""
+    rng = random.Random(seed)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    live = []
+    for _ in range(sessions):
+        ai = factory()
+        for _ in range(rounds):
+            ai.get_ai_choice()
+            ai.add_move(rng.choice(MOVES))
+        live.append(ai)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before - sessions * 8) / sessions  # Exclude the list slot holding each session
+
+
+if __name__ == "__main__":
+    for factory in (EnhancedPatternAI, CompactPatternAI):
+        print(f"{factory.__name__}: {measure_session_bytes(factory):,.0f} bytes per session")
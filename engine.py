@@ -0,0 +1,951 @@
+"""Game rules, AI and score state for Rock-Paper-Scissors.
+
+The move set and who beats whom come from a rules.Rules object, so the AI
+and GameState also play Rock-Paper-Scissors-Lizard-Spock and other odd-N
+cyclic variants; MOVES and COUNTER_MOVES are the classic game's.
+
+This module has no pygame dependency so the AI can be used from servers,
+worker processes and benchmarks without opening a window.
+"""
+import json
+import math
+import sys
+import time
+from array import array
+from collections import defaultdict, deque, Counter
+from types import MethodType
+
+from rng import BlockRNG
+from rules import RPS
+
+MOVES = RPS.moves
+
+# Move that beats each move
+COUNTER_MOVES = RPS.counter_moves
+
+MAX_ROUNDS = 25
+
+# Ensemble strategies in voting order, with their starting weights
+STRATEGY_WEIGHTS = {
+    'frequency': 1.0,
+    'anti_frequency': 1.0,
+    'alternating': 1.0,
+    'repeating': 1.0,
+    'cycle': 1.0,
+    'reactive': 1.0,
+    'markov_2': 1.0,
+    'markov_3': 1.0,
+    'sequence_match': 1.0,
+    'random': 0.3
+}
+
+FREQUENCY_WINDOW = 15  # Moves counted by the frequency strategies
+# Longest repeating pattern the periodicity detector looks for. With N moves an
+# update costs about 4 + MAX_PERIOD / N**4 steps and memory is O(MAX_PERIOD).
+MAX_PERIOD = 64
+CONTEXT_LIMIT = 1 << 20  # Moves the suffix automaton indexes before it drops the older half
+EXPLOIT_RATE = 0.85  # Share of moves that counter the ensemble's prediction; the rest are random
+WEIGHT_FLOOR = 0.1  # A strategy's weight is max(WEIGHT_FLOOR, success rate * WEIGHT_SCALE)
+WEIGHT_SCALE = 2.0
+
+
+def determine_result(player_choice, ai_choice, rules=RPS):
+    """Return 'win', 'lose' or 'draw' from the player's point of view"""
+    return rules.result(player_choice, ai_choice)
+
+
+class StrategyProfiler:
+    """Per-strategy call counts, timings, vote share and hit rate"""
+    def __init__(self, names):
+        self.rounds = 0  # Ensemble decisions recorded
+        self.stats = {}
+        self.pending = {}  # Last round's prediction per strategy, scored by the next move
+        for name in names:
+            self.track(name)
+    
+    def track(self, name):
+        """Start collecting stats for a strategy"""
+        self.stats.setdefault(name, {'calls': 0, 'total_time': 0.0, 'max_time': 0.0, 'none': 0,
+                                     'votes': 0, 'hits': 0, 'scored': 0})
+    
+    def record_call(self, name, elapsed, prediction):
+        stats = self.stats[name]
+        stats['calls'] += 1
+        stats['total_time'] += elapsed
+        if elapsed > stats['max_time']:
+            stats['max_time'] = elapsed
+        if prediction is None:
+            stats['none'] += 1
+        else:
+            self.pending[name] = prediction
+    
+    def record_vote(self, contributing_methods):
+        """Count the strategies that voted for the chosen prediction"""
+        self.rounds += 1
+        for name in contributing_methods:
+            self.stats[name]['votes'] += 1
+    
+    def record_outcome(self, move):
+        """Score every strategy's pending prediction against the actual move"""
+        for name, prediction in self.pending.items():
+            stats = self.stats[name]
+            stats['scored'] += 1
+            if prediction == move:
+                stats['hits'] += 1
+        self.pending = {}
+    
+    def snapshot(self):
+        """Return the raw counters plus derived rates for every strategy"""
+        report = {}
+        for name, stats in self.stats.items():
+            calls = stats['calls']
+            report[name] = dict(stats,
+                                mean_time=stats['total_time'] / calls if calls else 0.0,
+                                none_rate=stats['none'] / calls if calls else 0.0,
+                                vote_share=stats['votes'] / self.rounds if self.rounds else 0.0,
+                                hit_rate=stats['hits'] / stats['scored'] if stats['scored'] else 0.0)
+        return report
+    
+    def dump(self, file=None):
+        """Write the snapshot as JSON to a path or file object (stdout by default)"""
+        data = {'rounds': self.rounds, 'strategies': self.snapshot()}
+        if isinstance(file, str):
+            with open(file, "w") as f:
+                json.dump(data, f, indent=2)
+        else:
+            json.dump(data, file or sys.stdout, indent=2)
+    
+    def format_lines(self):
+        """Short text table, one line per strategy, for overlays and logs"""
+        lines = [f"{'strategy':<15}{'calls':>7}{'avg us':>8}{'max us':>8}{'none':>6}{'vote':>6}{'hit':>6}"]
+        for name, stats in self.snapshot().items():
+            lines.append(f"{name:<15}{stats['calls']:>7}{stats['mean_time'] * 1e6:>8.1f}{stats['max_time'] * 1e6:>8.1f}"
+                         f"{stats['none_rate']:>6.0%}{stats['vote_share']:>6.0%}{stats['hit_rate']:>6.0%}")
+        return lines
+
+
+class Strategy:
+    """Entry in the ensemble's dispatch table.
+
+    predict is called with the EnhancedPatternAI and returns a predicted
+    player move or None; features names the shared derived features
+    (see FEATURES) it reads from ai.features.
+    """
+    def __init__(self, name, predict, weight=1.0, features=()):
+        self.name = name
+        self.predict = predict
+        self.weight = weight
+        self.features = tuple(features)
+
+
+class _Bucket:
+    __slots__ = ('count', 'moves', 'prev', 'next')
+    
+    def __init__(self, count):
+        self.count = count
+        self.moves = {}  # Used as an insertion-ordered set
+        self.prev = self.next = None
+
+
+class FrequencyBuckets:
+    """Move counts with O(1) increment, decrement, most and least frequent.
+    
+    Moves with the same count share a bucket; buckets form a linked list in
+    count order, so the extremes are always at the two ends. Only moves with
+    a count of at least one are present.
+    """
+    def __init__(self):
+        self.head = _Bucket(0)  # Sentinels at both ends
+        self.tail = _Bucket(None)
+        self.head.next, self.tail.prev = self.tail, self.head
+        self.bucket_of = {}
+    
+    def _insert_after(self, bucket, count):
+        new = _Bucket(count)
+        new.prev, new.next = bucket, bucket.next
+        bucket.next.prev = bucket.next = new
+        return new
+    
+    def _discard(self, bucket, move):
+        del bucket.moves[move]
+        if not bucket.moves:
+            bucket.prev.next, bucket.next.prev = bucket.next, bucket.prev
+    
+    def increment(self, move):
+        bucket = self.bucket_of.get(move, self.head)
+        target = bucket.next
+        if target is self.tail or target.count != bucket.count + 1:
+            target = self._insert_after(bucket, bucket.count + 1)
+        target.moves[move] = None
+        self.bucket_of[move] = target
+        if bucket is not self.head:
+            self._discard(bucket, move)
+    
+    def decrement(self, move):
+        bucket = self.bucket_of[move]
+        if bucket.count == 1:
+            del self.bucket_of[move]
+        else:
+            target = bucket.prev
+            if target is self.head or target.count != bucket.count - 1:
+                target = self._insert_after(bucket.prev, bucket.count - 1)
+            target.moves[move] = None
+            self.bucket_of[move] = target
+        self._discard(bucket, move)
+    
+    def count(self, move):
+        bucket = self.bucket_of.get(move)
+        return bucket.count if bucket else 0
+    
+    def most_common(self):
+        """Most frequent move, or None when empty"""
+        bucket = self.tail.prev
+        return next(iter(bucket.moves)) if bucket is not self.head else None
+    
+    def least_common(self):
+        """Least frequent move among those present, or None when empty"""
+        bucket = self.head.next
+        return next(iter(bucket.moves)) if bucket is not self.tail else None
+
+
+class SlidingWindowCounts:
+    """Move counts over several trailing windows, sharing one ring of moves.
+    
+    Each new move is added to every window and the move falling out of each
+    window is evicted, so an update costs O(number of windows) and most or
+    least frequent queries are O(1).
+    """
+    def __init__(self, windows=(FREQUENCY_WINDOW,)):
+        self.windows = {window: FrequencyBuckets() for window in sorted(set(windows))}
+        self.size = max(self.windows)
+        self.ring = [None] * self.size
+        self.length = 0  # Moves added so far
+    
+    def add(self, move):
+        t = self.length
+        for window, buckets in self.windows.items():
+            if t >= window:
+                buckets.decrement(self.ring[(t - window) % self.size])
+            buckets.increment(move)
+        self.ring[t % self.size] = move
+        self.length = t + 1
+    
+    def update(self, history):
+        self.add(history[-1])
+    
+    def counts(self, window):
+        buckets = self.windows[window]
+        return {move: bucket.count for move, bucket in buckets.bucket_of.items()}
+    
+    def most_common(self, window):
+        return self.windows[window].most_common()
+    
+    def least_common(self, window):
+        return self.windows[window].least_common()
+
+
+class RepeatRun:
+    """How many times in a row the latest move has been played"""
+    def __init__(self):
+        self.move = None
+        self.length = 0
+    
+    def update(self, history):
+        move = history[-1]
+        self.length = self.length + 1 if move == self.move else 1
+        self.move = move
+
+
+class PeriodicityDetector:
+    """Finds every period up to max_period that the recent moves repeat with.
+    
+    For each period p it keeps the streak of consecutive moves that equal
+    the move p steps earlier; p is detected once the streak covers p moves,
+    i.e. the last 2p moves are one pattern played twice. Periods up to
+    key_length are checked directly on every move. A longer period can only
+    be detected once its streak covers key_length moves, so its streak is
+    seeded lazily: only when the latest key_length moves occurred p steps
+    earlier, found in an index of key_length-grams. Broken streaks are
+    noticed lazily as well. An update costs key_length plus the earlier
+    occurrences of the latest key_length moves in the window, about
+    max_period / N**key_length for N moves played at random.
+    
+    The index links each position to the previous end position of the same
+    key_length-gram in a flat ring, and maps each key to its latest end
+    position; a key is dropped when that position leaves the window. Memory
+    is O(max_period) whatever the number of moves.
+    """
+    def __init__(self, max_period=MAX_PERIOD, key_length=4):
+        self.max_period = max_period
+        self.key_length = key_length
+        self.size = max_period + key_length + 1
+        self.ring = [None] * self.size  # Last max_period + key_length + 1 moves
+        self.t = -1  # Position of the latest move
+        self.last_match = [-2] * (max_period + 1)  # Latest position matching p steps back
+        self.streak_start = [0] * (max_period + 1)
+        self.latest = {}  # key_length-gram -> its latest end position in the window
+        self.previous = array('q', [-1]) * (max_period + 1)  # previous[t % (max_period + 1)]: same key's end before t
+        self.detected = []  # Periods detected at the latest move, shortest first
+    
+    def update(self, history):
+        self.add(history[-1])
+    
+    def _match(self, period, t, start):
+        """Record that the move at t equals the move period steps back, in a streak from start"""
+        if self.last_match[period] != t - 1:
+            self.streak_start[period] = start
+        self.last_match[period] = t
+        return t - self.streak_start[period] + 1 >= period
+    
+    def add(self, move):
+        t = self.t = self.t + 1
+        ring, size, k = self.ring, self.size, self.key_length
+        ring[t % size] = move
+        
+        detected = []
+        for period in range(1, min(k, self.max_period, t) + 1):  # Short periods, checked directly
+            if ring[(t - period) % size] == move and self._match(period, t, t):
+                detected.append(period)
+        
+        if t >= k - 1:
+            window = self.max_period + 1
+            oldest = t - self.max_period  # Earliest end position still in the window
+            latest = self.latest
+            if oldest - 1 >= k - 1:  # Forget the key ending at the position that just left the window
+                gone = tuple(ring[(oldest - 1 - i) % size] for i in range(k - 1, -1, -1))
+                if latest.get(gone) == oldest - 1:
+                    del latest[gone]
+            
+            key = tuple(ring[(t - i) % size] for i in range(k - 1, -1, -1))
+            position = latest.get(key)
+            if position is None:
+                position = -1
+            self.previous[t % window] = position
+            latest[key] = t
+            
+            last_match, streak_start, previous = self.last_match, self.streak_start, self.previous
+            lowest = max(oldest, 0)
+            while position >= lowest:  # Latest first, so shortest period first
+                period = t - position
+                if period > k:  # Same as _match, inlined for the hot loop
+                    if last_match[period] != t - 1:
+                        streak_start[period] = t - k + 1
+                    last_match[period] = t
+                    if t - streak_start[period] + 1 >= period:
+                        detected.append(period)
+                position = previous[position % window]
+        self.detected = detected
+    
+    def run(self, period):
+        """How many of the latest moves in a row equal the move period steps earlier"""
+        if self.last_match[period] == self.t:
+            return self.t - self.streak_start[period] + 1
+        if period <= self.key_length:
+            return 0
+        # Streaks shorter than key_length are not tracked for long periods; count them here
+        ring, size, t = self.ring, self.size, self.t
+        length = 0
+        while length < min(self.key_length, t - period + 1) and \
+                ring[(t - length) % size] == ring[(t - length - period) % size]:
+            length += 1
+        return length
+    
+    def next_move(self, period):
+        """Next move if the stream keeps repeating with this period"""
+        return self.ring[(self.t + 1 - period) % self.size]
+    
+    def shortest_period(self, minimum=1, maximum=None):
+        """Shortest detected period in [minimum, maximum], or None"""
+        for period in self.detected:
+            if period >= minimum and (maximum is None or period <= maximum):
+                return period
+        return None
+
+
+class SuffixAutomaton:
+    """Suffix automaton of the move stream, for matching the longest earlier context.
+    
+    States live in flat int arrays (suffix link, longest length, first end
+    position and one transition per move), and adding a move creates at most
+    two states, so updates are amortized O(1). After each move the suffix link
+    of the state for the whole stream is the longest suffix that occurred
+    before; predict() returns the move that followed its first occurrence.
+    When the stream reaches limit moves the automaton is rebuilt from the
+    latest half, which bounds memory and keeps the cost amortized constant.
+    """
+    def __init__(self, moves=MOVES, limit=CONTEXT_LIMIT):
+        self.moves = moves
+        self.code = {move: i for i, move in enumerate(moves)}
+        self.size = len(moves)
+        self.limit = limit
+        self.no_transitions = array('i', [-1] * self.size)
+        self._clear()
+    
+    def _clear(self):
+        self.stream = bytearray()  # Move codes seen so far
+        self.link = array('i', [-1])  # State 0 is the empty string
+        self.length = array('i', [0])
+        self.firstpos = array('i', [-1])
+        self.next = array('i', self.no_transitions)  # next[state * size + code]
+        self.last = 0  # State of the whole stream
+        self.match_length = 0  # Length of the longest earlier context
+        self.match_end = -1  # Where that context first ended
+    
+    def update(self, history):
+        self.add(history[-1])
+    
+    def add(self, move):
+        if len(self.stream) >= self.limit:
+            kept = self.stream[len(self.stream) - self.limit // 2:]
+            self._clear()
+            for code in kept:
+                self._extend(code)
+        self._extend(self.code[move])
+    
+    def _extend(self, code):
+        size, nxt, link, length, firstpos = self.size, self.next, self.link, self.length, self.firstpos
+        position = len(self.stream)
+        self.stream.append(code)
+        cur = len(length)
+        length.append(length[self.last] + 1)
+        link.append(0)
+        firstpos.append(position)
+        nxt.extend(self.no_transitions)
+        
+        p = self.last
+        while p != -1 and nxt[p * size + code] == -1:
+            nxt[p * size + code] = cur
+            p = link[p]
+        if p != -1:
+            q = nxt[p * size + code]
+            if length[p] + 1 == length[q]:
+                link[cur] = q
+            else:
+                # Split q: the clone takes the shorter contexts that now also end here
+                clone = len(length)
+                length.append(length[p] + 1)
+                link.append(link[q])
+                firstpos.append(firstpos[q])
+                nxt.extend(nxt[q * size:(q + 1) * size])
+                while p != -1 and nxt[p * size + code] == q:
+                    nxt[p * size + code] = clone
+                    p = link[p]
+                link[q] = clone
+                link[cur] = clone
+        self.last = cur
+        
+        context = link[cur]
+        self.match_length = length[context]
+        self.match_end = firstpos[context]
+    
+    def predict(self):
+        """Move that followed the longest earlier match of the latest moves, or None"""
+        if self.match_length == 0:
+            return None
+        return self.moves[self.stream[self.match_end + 1]]
+
+
+class LegacyRatio:
+    """Original weighting: only the first contributor to the winning vote is scored.
+    
+    Its weight becomes max(weight_floor, lifetime success rate * weight_scale)
+    once it has three attempts. Every other strategy keeps its weight.
+    """
+    scores_all = False  # Only needs the vote, not every strategy's prediction
+    
+    def update(self, ai, move):
+        method = ai.last_method
+        if ai.last_prediction and method:
+            slot = ai.slots[method]
+            if move == ai.last_prediction:
+                ai.successes[slot] += 1
+            ai.attempts[slot] += 1
+            if ai.attempts[slot] >= 3:
+                ai.weights[slot] = max(ai.weight_floor, ai.successes[slot] / ai.attempts[slot] * ai.weight_scale)
+
+
+class HedgeWeights:
+    """Multiplicative weights: every strategy that missed has its weight multiplied by exp(-eta).
+    
+    Strategies that abstained sit the round out. The weights of the strategies
+    that predicted are rescaled to keep their total, so they neither vanish
+    nor drift against the abstainers, and floor keeps a strategy that was
+    wrong for a long time able to recover when the player changes style.
+    """
+    scores_all = True
+    
+    def __init__(self, eta=0.5, floor=0.01):
+        self.factors = (math.exp(-eta), 1.0)  # Weight multiplier indexed by hit
+        self.floor = floor
+    
+    def update(self, ai, move):
+        weights, successes, attempts, factors = ai.weights, ai.successes, ai.attempts, self.factors
+        scored = []  # (slot, hit) of every strategy that predicted
+        before = after = 0.0
+        for slot, (_, prediction) in zip(ai.round_slots, ai.round_predictions):
+            if prediction:
+                hit = prediction == move
+                scored.append((slot, hit))
+                before += weights[slot]
+                after += weights[slot] * factors[hit]
+        if not scored:
+            return
+        scale = before / after
+        floor = self.floor
+        for slot, hit in scored:
+            weights[slot] = max(floor, weights[slot] * factors[hit] * scale)
+            successes[slot] += hit
+            attempts[slot] += 1
+
+
+class DecayedAccuracy:
+    """Every strategy that predicted moves its weight toward weight_scale on a hit and 0 on a miss.
+    
+    The weight is an exponential moving average of hits * weight_scale
+    (floored at weight_floor), so recent rounds count most and the weights
+    follow a player who changes style. It starts from the strategy's initial
+    weight.
+    """
+    scores_all = True
+    
+    def __init__(self, decay=0.9):
+        self.decay = decay
+    
+    def update(self, ai, move):
+        decay = self.decay
+        gain = (1 - decay) * ai.weight_scale
+        floor = ai.weight_floor
+        weights, successes, attempts = ai.weights, ai.successes, ai.attempts
+        for slot, (_, prediction) in zip(ai.round_slots, ai.round_predictions):
+            if prediction:
+                hit = prediction == move
+                weights[slot] = max(floor, decay * weights[slot] + gain * hit)
+                successes[slot] += hit
+                attempts[slot] += 1
+
+
+# Weight update rules by name, for command-line tools
+WEIGHTING_SCHEMES = {
+    'legacy': LegacyRatio,
+    'hedge': HedgeWeights,
+    'decayed': DecayedAccuracy,
+}
+
+
+# Shared derived features, built per AI when an enabled strategy declares them
+FEATURES = {
+    'window_counts': lambda ai: SlidingWindowCounts(ai.frequency_windows),
+    'repeat_run': lambda ai: RepeatRun(),
+    'periodicity': lambda ai: PeriodicityDetector(ai.max_period),
+    'suffix_automaton': lambda ai: SuffixAutomaton(ai.moves, ai.context_limit),
+}
+
+
+class EnhancedPatternAI:
+    def __init__(self, history_size=50, markov_orders=(2, 3), frequency_windows=(FREQUENCY_WINDOW,),
+                 max_period=MAX_PERIOD, exploit_rate=EXPLOIT_RATE, weight_floor=WEIGHT_FLOOR,
+                 weight_scale=WEIGHT_SCALE, weighting=None, context_limit=CONTEXT_LIMIT, rng=None, rules=RPS):
+        self.rules = rules  # Moves and counter-move index of the game being played
+        self.moves = rules.moves
+        self.move_history = deque(maxlen=history_size)  # Oldest move drops off in O(1)
+        self.rng = rng or BlockRNG()  # This session's random draws; pass a seeded BlockRNG to replay it
+        self.history_size = history_size  # Moves kept for pattern analysis
+        self.max_period = max_period  # Longest cycle the cycle strategy can find
+        self.context_limit = context_limit  # Moves indexed by the sequence_match strategy
+        self.exploit_rate = exploit_rate
+        self.weight_floor = weight_floor
+        self.weight_scale = weight_scale
+        self.weighting = weighting or LegacyRatio()  # Weight update rule applied by add_move
+        # Horizons tracked by the window_counts feature; the first is used by the
+        # frequency strategies. No window reaches past the history.
+        self.frequency_windows = tuple(min(window, history_size) for window in frequency_windows)
+        # Transition counts per Markov order: {order: {context: Counter(next)}}
+        # kept in step with move_history so predictions are a table lookup
+        self.ngram_counts = {order: defaultdict(Counter) for order in markov_orders}
+        # Per-strategy weight and success stats in flat lists, indexed by the
+        # strategy's slot (its registration order); disabled strategies keep theirs
+        self.slots = {}  # name -> slot
+        self.weights = []
+        self.successes = []
+        self.attempts = []
+        self.registry = {}  # name -> Strategy, including disabled ones
+        self.disabled = set()
+        self.features = {}  # Shared derived features kept up to date by add_move
+        self.dispatch = []  # (name, bound predict) for every enabled strategy, in voting order
+        self.dispatch_slots = []  # Slot of each dispatch entry
+        self.profiler = None  # StrategyProfiler while profiling is enabled
+        for strategy in DEFAULT_STRATEGIES:
+            self.add_strategy(strategy)
+        self.last_prediction = None
+        self.last_method = None
+        self.last_contributors = []  # Every strategy that voted for last_prediction
+        self.round_predictions = []  # (method, prediction) of every enabled strategy this round
+        self.round_slots = []  # Slot of each round prediction
+        # Prediction behind the latest get_ai_choice and the strategies that voted
+        # for it; None and empty when that choice was random
+        self.choice_prediction = None
+        self.choice_contributors = []
+    
+    def add_strategy(self, strategy):
+        """Register a Strategy (or replace one with the same name) and enable it"""
+        self.registry[strategy.name] = strategy
+        if strategy.name not in self.slots:
+            self.slots[strategy.name] = len(self.weights)
+            self.weights.append(strategy.weight)
+            self.successes.append(0)
+            self.attempts.append(0)
+        self.disabled.discard(strategy.name)
+        if self.profiler is not None:
+            self.profiler.track(strategy.name)
+        self._rebuild_dispatch()
+    
+    def enable_strategy(self, name):
+        if name not in self.registry:
+            raise KeyError(name)
+        self.disabled.discard(name)
+        self._rebuild_dispatch()
+    
+    def disable_strategy(self, name):
+        """Stop asking a strategy for predictions; its stats are kept"""
+        if name not in self.registry:
+            raise KeyError(name)
+        self.disabled.add(name)
+        self._rebuild_dispatch()
+    
+    def _rebuild_dispatch(self):
+        enabled = [s for name, s in self.registry.items() if name not in self.disabled]
+        self.dispatch = [(s.name, MethodType(s.predict, self)) for s in enabled]
+        self.dispatch_slots = [self.slots[s.name] for s in enabled]
+        
+        # Keep exactly the features the enabled strategies need; new ones catch up on the history
+        needed = {feature for s in enabled for feature in s.features}
+        for feature in needed - self.features.keys():
+            self.features[feature] = FEATURES[feature](self)
+            replayed = []
+            for move in self.move_history:
+                replayed.append(move)
+                self.features[feature].update(replayed)
+        for feature in self.features.keys() - needed:
+            del self.features[feature]
+    
+    def enable_profiling(self):
+        """Start recording per-strategy stats and return the profiler"""
+        if self.profiler is None:
+            self.profiler = StrategyProfiler(self.registry)
+        return self.profiler
+    
+    def disable_profiling(self):
+        self.profiler = None
+    
+    def add_move(self, move):
+        """Add a move to history and update strategy success rates"""
+        if self.profiler is not None:
+            self.profiler.record_outcome(move)
+        self._count_ngrams_ending_with(move, 1)
+        if len(self.move_history) == self.history_size:  # Keep last history_size moves
+            self._count_oldest_ngrams(move, -1)  # The deque drops the oldest move on append
+        self.move_history.append(move)
+        for feature in self.features.values():
+            feature.update(self.move_history)
+        
+        # Score the strategies' predictions for this move
+        self.weighting.update(self, move)
+        self.round_predictions = []
+        self.round_slots = []
+    
+    def _count_ngrams_ending_with(self, move, delta):
+        """Add delta to every transition from the latest moves to move, which is about to be added"""
+        history = self.move_history
+        for order, table in self.ngram_counts.items():
+            if len(history) >= order:  # Indexing near either end of a deque is O(1)
+                self._bump(table, tuple(history[i] for i in range(-order, 0)), move, delta)
+    
+    def _count_oldest_ngrams(self, move, delta):
+        """Add delta to every transition whose context starts at the oldest move"""
+        history = self.move_history
+        for order, table in self.ngram_counts.items():
+            if len(history) >= order:
+                next_move = history[order] if order < len(history) else move
+                self._bump(table, tuple(history[i] for i in range(order)), next_move, delta)
+    
+    @staticmethod
+    def _bump(table, context, next_move, delta):
+        counts = table[context]
+        counts[next_move] += delta
+        if counts[next_move] <= 0:
+            del counts[next_move]
+            if not counts:
+                del table[context]
+    
+    def predict_frequency_based(self):
+        """Predict based on most frequent move"""
+        if len(self.move_history) < 3:
+            return None
+        
+        return self.features['window_counts'].most_common(self.frequency_windows[0])
+    
+    def predict_anti_frequency(self):
+        """Predict least frequent move (counter to frequency bias)"""
+        if len(self.move_history) < 3:
+            return None
+        
+        return self.features['window_counts'].least_common(self.frequency_windows[0])
+    
+    def predict_alternating(self):
+        """Detect and predict alternating patterns (ABAB, ABCABC, etc.)"""
+        periodicity = self.features['periodicity']
+        for period in (2, 3):
+            # The pattern must mix moves; a plain repeat is predict_repeating's job
+            if period in periodicity.detected and periodicity.run(1) < period - 1:
+                return periodicity.next_move(period)
+        
+        return None
+    
+    def predict_repeating(self):
+        """Detect repeating patterns"""
+        # Two or more of the same move in a row: expect it again
+        if self.features['repeat_run'].length >= 2:
+            return self.move_history[-1]
+        
+        return None
+    
+    def predict_cycle(self):
+        """Detect cycle patterns like RPS-RPS-RPS, up to max_period moves long"""
+        periodicity = self.features['periodicity']
+        cycle_length = periodicity.shortest_period(3)
+        if cycle_length is None:
+            return None
+        
+        # Found a cycle, predict next move in cycle
+        return periodicity.next_move(cycle_length)
+    
+    def predict_reactive(self):
+        """Predict based on reaction to AI's last move"""
+        if len(self.move_history) < 2:
+            return None
+        
+        # This would need AI's move history to work properly
+        # For now, assume player might copy their own last move
+        return self.move_history[-1]
+    
+    def predict_markov(self, order):
+        """Nth order Markov chain: predict what followed the last N moves"""
+        if len(self.move_history) < order + 1:
+            return None
+        
+        if order not in self.ngram_counts:
+            raise ValueError(f"Markov order {order} is not tracked")
+        
+        history = self.move_history
+        next_moves = self.ngram_counts[order].get(tuple(history[i] for i in range(-order, 0)))
+        if next_moves:
+            return next_moves.most_common(1)[0][0]
+        return None
+    
+    def predict_markov_2(self):
+        """2nd order Markov chain: predict based on last 2 moves"""
+        return self.predict_markov(2)
+    
+    def predict_markov_3(self):
+        """3rd order Markov chain: predict based on last 3 moves"""
+        return self.predict_markov(3)
+    
+    def predict_sequence_match(self):
+        """Variable-order context: what followed the longest earlier repeat of the latest moves"""
+        return self.features['suffix_automaton'].predict()
+    
+    def predict_random(self):
+        """Random guess to keep the ensemble unpredictable"""
+        return self.rng.choice(self.moves)
+    
+    def _profiled_predictions(self):
+        """Run every strategy, timing each call for the profiler"""
+        predictions = []
+        clock = time.perf_counter
+        for method, predict in self.dispatch:
+            start = clock()
+            prediction = predict()
+            self.profiler.record_call(method, clock() - start, prediction)
+            predictions.append((method, prediction))
+        return predictions
+    
+    def get_weighted_prediction(self):
+        """Get prediction using weighted ensemble of all strategies"""
+        if len(self.move_history) < 2:
+            return self.rng.choice(self.moves), 'random'
+        
+        return self._decide(self._predictions())
+    
+    def _predictions(self):
+        """Ask every enabled strategy for a prediction and keep them for the weight update"""
+        if self.profiler is not None:
+            predictions = self._profiled_predictions()
+        else:
+            predictions = [(method, predict()) for method, predict in self.dispatch]
+        self.round_predictions = predictions
+        self.round_slots = self.dispatch_slots
+        return predictions
+    
+    def _decide(self, predictions):
+        """Weighted vote over the strategies' predictions"""
+        # Weight predictions by strategy success
+        weighted_votes = {}
+        weights = self.weights
+        for slot, (_, prediction) in zip(self.round_slots, predictions):
+            if prediction:
+                weighted_votes[prediction] = weighted_votes.get(prediction, 0.0) + weights[slot]
+        
+        if not weighted_votes:
+            return self.rng.choice(self.moves), 'random'
+        
+        # Choose prediction with highest weight
+        predicted_move = max(weighted_votes, key=weighted_votes.get)
+        contributing_methods = [method for method, prediction in predictions if prediction == predicted_move]
+        
+        # Store for success tracking
+        self.last_prediction = predicted_move
+        self.last_method = contributing_methods[0] if contributing_methods else 'random'
+        self.last_contributors = contributing_methods
+        if self.profiler is not None:
+            self.profiler.record_vote(contributing_methods)
+        
+        return predicted_move, self.last_method
+    
+    def get_counter_move(self, predicted_player_move):
+        """Get the move that beats the predicted player move"""
+        counter = self.rules.counter_moves.get(predicted_player_move)
+        return counter if counter is not None else self.rng.choice(self.moves)
+    
+    def get_ai_choice(self):
+        """Main AI decision function"""
+        self.choice_prediction = None
+        self.choice_contributors = []
+        if len(self.move_history) < 2:
+            return self.rng.choice(self.moves)
+        
+        # Use weighted prediction exploit_rate of the time (85% by default)
+        if self.rng.random() < self.exploit_rate:
+            predicted_move, method = self.get_weighted_prediction()
+            if method != 'random':
+                self.choice_prediction = predicted_move
+                self.choice_contributors = self.last_contributors
+            return self.get_counter_move(predicted_move)
+        else:
+            # Random move otherwise to stay unpredictable
+            if self.weighting.scores_all:
+                self._predictions()  # Still score every strategy on this move
+            return self.rng.choice(self.moves)
+
+
+# Built-in strategies in voting order
+DEFAULT_STRATEGIES = [
+    Strategy('frequency', EnhancedPatternAI.predict_frequency_based, STRATEGY_WEIGHTS['frequency'], ('window_counts',)),
+    Strategy('anti_frequency', EnhancedPatternAI.predict_anti_frequency, STRATEGY_WEIGHTS['anti_frequency'], ('window_counts',)),
+    Strategy('alternating', EnhancedPatternAI.predict_alternating, STRATEGY_WEIGHTS['alternating'], ('periodicity',)),
+    Strategy('repeating', EnhancedPatternAI.predict_repeating, STRATEGY_WEIGHTS['repeating'], ('repeat_run',)),
+    Strategy('cycle', EnhancedPatternAI.predict_cycle, STRATEGY_WEIGHTS['cycle'], ('periodicity',)),
+    Strategy('reactive', EnhancedPatternAI.predict_reactive, STRATEGY_WEIGHTS['reactive']),
+    Strategy('markov_2', EnhancedPatternAI.predict_markov_2, STRATEGY_WEIGHTS['markov_2']),
+    Strategy('markov_3', EnhancedPatternAI.predict_markov_3, STRATEGY_WEIGHTS['markov_3']),
+    Strategy('sequence_match', EnhancedPatternAI.predict_sequence_match, STRATEGY_WEIGHTS['sequence_match'],
+             ('suffix_automaton',)),
+    Strategy('random', EnhancedPatternAI.predict_random, STRATEGY_WEIGHTS['random']),
+]
+
+
+class GameState:
+    """Scores and round state for one match against an EnhancedPatternAI.
+    
+    With a profile store (see profiles.ProfileStore) and a player id, each
+    new AI is warm-started from the player's profile and what it learned is
+    saved back when the match is reset or the session ends. With a match log
+    (see matchlog.MatchLogWriter) every round is recorded under session_id.
+    Every AI of the session draws from one BlockRNG, so with a seed the same
+    player moves replay the session exactly. rules picks the game variant
+    and is passed on to ai_factory with the rng.
+    """
+    def __init__(self, max_rounds=MAX_ROUNDS, ai_factory=EnhancedPatternAI, profiles=None, player_id=None,
+                 log=None, session_id=0, seed=None, rules=RPS):
+        self.max_rounds = max_rounds
+        self.rules = rules
+        self.ai_factory = ai_factory
+        self.profiles = profiles
+        self.player_id = player_id
+        self.log = log
+        self.session_id = session_id
+        self.match = 0  # Matches started this session
+        self.rng = BlockRNG(seed)
+        self.ai = None
+        self.reset()
+    
+    def reset(self):
+        """Start a new match with a fresh AI"""
+        self.save_profile()
+        self.player_score = 0
+        self.ai_score = 0
+        self.draws = 0
+        self.rounds_played = 0
+        self.game_over = False
+        self.match += 1
+        self.ai = self.ai_factory(rng=self.rng, rules=self.rules)  # Reset AI learning
+        if self.profiles is not None and self.player_id is not None:
+            self.profiles.load(self.player_id, self.ai)
+        self.reset_round()
+    
+    def set_player(self, player_id):
+        """Switch to another player's profile and start a new match"""
+        self.save_profile()
+        self.player_id = player_id
+        self.ai = None  # Already saved
+        self.reset()
+    
+    def save_profile(self):
+        """Write what the AI learned this match to the player's profile"""
+        if self.profiles is not None and self.player_id is not None and self.ai is not None and self.ai.move_history:
+            self.profiles.save(self.player_id, self.ai)
+    
+    def reset_round(self):
+        self.player_choice = None
+        self.ai_choice = None
+        self.result = None
+    
+    def play_round(self, choice, ai_choice=None):
+        """Play the player's move against the AI and return the result.
+        
+        ai_choice is the AI's move if it was already worked out (see
+        offload.PredictionOffload); otherwise the AI chooses now.
+        """
+        if self.game_over or self.result:  # Prevent multiple clicks
+            return None
+        
+        self.player_choice = choice
+        
+        # AI makes its choice BEFORE seeing player's choice (prediction happens here)
+        self.ai_choice = ai_choice if ai_choice is not None else self.ai.get_ai_choice()
+        
+        # Add player's move to AI's learning history
+        self.ai.add_move(choice)
+        
+        self.result = self.rules.result(choice, self.ai_choice)
+        if self.result == "win":
+            self.player_score += 1
+        elif self.result == "lose":
+            self.ai_score += 1
+        else:
+            self.draws += 1
+        
+        self.rounds_played += 1  # Count all rounds including draws
+        
+        if self.log is not None:
+            self.log.log_round(self.session_id, self.match, self.rounds_played, choice, self.ai_choice,
+                               self.ai.choice_prediction, self.ai.choice_contributors, self.result)
+        
+        # Check if game is over
+        if self.rounds_played >= self.max_rounds:
+            self.game_over = True
+        
+        return self.result
+    
+    @property
+    def ai_win_rate(self):
+        return (self.ai_score / self.rounds_played * 100) if self.rounds_played > 0 else 0
@@ -0,0 +1,237 @@
+"""Append-only round log with streaming readers and a columnar export.
+
+Every round is one fixed-size little-endian record:
+
+    session u64, match u32, round u32,
+    player u8, ai u8, predicted u8 (255 = no prediction), result u8,
+    contributors u32 (bit i set = strategy i voted for the prediction)
+
+Moves index the header's move list, results index LOG_RESULT_CODES (from
+the player's point of view) and contributor bits index the header's
+strategy list. The writer buffers records and appends them in bulk; the
+readers stream the file in chunks so logs of any size replay in constant
+memory.
+
+    python matchlog.py summary match_log.rpslog
+    python matchlog.py export match_log.rpslog match_log.rpscol
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import threading
+from array import array
+from collections import Counter, namedtuple
+
+from engine import MOVES, STRATEGY_WEIGHTS
+
+MAGIC = b'RPSLOG1\0'
+COLUMNS_MAGIC = b'RPSCOL1\0'
+# Result byte values of the file format; not the same order as rules.RESULTS
+LOG_RESULT_CODES = ('win', 'lose', 'draw')
+NO_PREDICTION = 255
+RECORD = struct.Struct('<QIIBBBBI')
+_LENGTH = struct.Struct('<I')
+
+# Column name and array typecode for the columnar export, in record order
+COLUMNS = (('session', 'Q'), ('match', 'I'), ('round', 'I'), ('player', 'B'), ('ai', 'B'),
+           ('predicted', 'B'), ('result', 'B'), ('contributors', 'I'))
+
+RoundRecord = namedtuple('RoundRecord', 'session match round player ai predicted result contributors')
+
+
+def _write_header(f, magic, layout):
+    encoded = json.dumps(layout).encode()
+    f.write(magic + _LENGTH.pack(len(encoded)) + encoded)
+
+
+def _read_header(f, magic):
+    if f.read(len(magic)) != magic:
+        raise ValueError(f"{f.name} is not a {magic.rstrip(bytes(1)).decode()} file")
+    length, = _LENGTH.unpack(f.read(_LENGTH.size))
+    return json.loads(f.read(length))
+
+
+class MatchLogWriter:
+    """Buffers round records and appends them to the log in bulk"""
+    def __init__(self, path, buffer_records=4096, moves=MOVES, strategies=tuple(STRATEGY_WEIGHTS)):
+        self.path = path
+        self.lock = threading.Lock()
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, 'rb') as f:
+                layout = _read_header(f, MAGIC)
+            if layout['moves'] != list(moves):
+                raise ValueError(f"{path} was written with a different move list")
+            strategies = layout['strategies']  # Keep the file's bit assignment; new strategies go unrecorded
+            self.file = open(path, 'ab')
+        else:
+            self.file = open(path, 'wb')
+            _write_header(self.file, MAGIC, {'moves': list(moves), 'strategies': list(strategies)})
+        self.move_index = {move: i for i, move in enumerate(moves)}
+        self.strategy_bit = {name: 1 << i for i, name in enumerate(strategies[:32])}
+        self.buffer = bytearray(RECORD.size * buffer_records)
+        self.buffered = 0
+        self.capacity = buffer_records
+
+    def log_round(self, session, match, round_number, player, ai, predicted, contributors, result):
+        """Record one round; predicted may be None and contributors is a list of strategy names"""
+        bits = 0
+        for name in contributors:
+            bits |= self.strategy_bit.get(name, 0)
+        predicted_code = NO_PREDICTION if predicted is None else self.move_index[predicted]
+        with self.lock:
+            RECORD.pack_into(self.buffer, self.buffered * RECORD.size, session, match, round_number,
+                             self.move_index[player], self.move_index[ai], predicted_code,
+                             LOG_RESULT_CODES.index(result), bits)
+            self.buffered += 1
+            if self.buffered == self.capacity:
+                self._flush()
+
+    def _flush(self):
+        self.file.write(memoryview(self.buffer)[:self.buffered * RECORD.size])
+        self.buffered = 0
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+            self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_layout(path):
+    with open(path, 'rb') as f:
+        return _read_header(f, MAGIC)
+
+
+def iter_chunks(path, chunk_records=65536):
+    """Yield raw record bytes in chunks of up to chunk_records records"""
+    with open(path, 'rb') as f:
+        _read_header(f, MAGIC)
+        while True:
+            chunk = f.read(RECORD.size * chunk_records)
+            if not chunk:
+                return
+            yield chunk[:len(chunk) - len(chunk) % RECORD.size]  # Ignore a torn final record
+
+
+def iter_raw(path, chunk_records=65536):
+    """Yield every record as a tuple of integer codes, in file order"""
+    for chunk in iter_chunks(path, chunk_records):
+        yield from RECORD.iter_unpack(chunk)
+
+
+def read_records(path, chunk_records=65536):
+    """Yield every record as a RoundRecord with move, result and strategy names decoded"""
+    layout = read_layout(path)
+    moves, strategies = layout['moves'], layout['strategies']
+    for session, match, round_number, player, ai, predicted, result, bits in iter_raw(path, chunk_records):
+        contributors = tuple(name for i, name in enumerate(strategies) if bits >> i & 1)
+        yield RoundRecord(session, match, round_number, moves[player], moves[ai],
+                          None if predicted == NO_PREDICTION else moves[predicted], LOG_RESULT_CODES[result], contributors)
+
+
+def summarize(path):
+    """Aggregate a log in one streaming pass: results, prediction accuracy and strategy votes"""
+    layout = read_layout(path)
+    strategies = layout['strategies']
+    results = Counter()
+    player_moves = Counter()
+    sessions = set()
+    predicted = correct = 0
+    votes = [0] * len(strategies)
+    for session, _, _, player, _, prediction, result, bits in iter_raw(path):
+        results[result] += 1
+        player_moves[player] += 1
+        sessions.add(session)
+        if prediction != NO_PREDICTION:
+            predicted += 1
+            correct += prediction == player
+        while bits:
+            low = bits & -bits
+            votes[low.bit_length() - 1] += 1
+            bits ^= low
+    rounds = sum(results.values())
+    return {
+        'rounds': rounds,
+        'sessions': len(sessions),
+        'results': {LOG_RESULT_CODES[code]: count for code, count in sorted(results.items())},
+        'player_moves': {layout['moves'][code]: count for code, count in sorted(player_moves.items())},
+        'prediction_accuracy': correct / predicted if predicted else 0.0,
+        'strategy_votes': dict(zip(strategies, votes)),
+    }
+
+
+def export_columns(path, out_path, group_records=65536):
+    """Convert a log into the columnar format, one row group per chunk of records.
+
+    The output is a header (magic and JSON layout) followed by row groups:
+    a u32 row count, then each column of COLUMNS as a packed little-endian
+    array. Returns the number of rows written.
+    """
+    layout = read_layout(path)
+    layout['columns'] = [list(column) for column in COLUMNS]
+    rows = 0
+    with open(out_path, 'wb') as out:
+        _write_header(out, COLUMNS_MAGIC, layout)
+        for chunk in iter_chunks(path, group_records):
+            count = len(chunk) // RECORD.size
+            columns = [array(typecode) for _, typecode in COLUMNS]
+            for record in RECORD.iter_unpack(chunk):
+                for column, value in zip(columns, record):
+                    column.append(value)
+            out.write(_LENGTH.pack(count))
+            for column in columns:
+                if sys.byteorder != 'little':
+                    column.byteswap()
+                column.tofile(out)
+            rows += count
+    return rows
+
+
+def read_columns(path):
+    """Yield each row group of a columnar export as {column name: array}"""
+    with open(path, 'rb') as f:
+        layout = _read_header(f, COLUMNS_MAGIC)
+        while True:
+            header = f.read(_LENGTH.size)
+            if not header:
+                return
+            count, = _LENGTH.unpack(header)
+            group = {}
+            for name, typecode in layout['columns']:
+                column = array(typecode)
+                column.fromfile(f, count)
+                if sys.byteorder != 'little':
+                    column.byteswap()
+                group[name] = column
+            yield group
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    summary = commands.add_parser('summary', help="aggregate a log")
+    summary.add_argument('log')
+    export = commands.add_parser('export', help="write a columnar copy of a log")
+    export.add_argument('log')
+    export.add_argument('output')
+    args = parser.parse_args()
+
+    if args.command == 'summary':
+        print(json.dumps(summarize(args.log), indent=2))
+    else:
+        print(f"{export_columns(args.log, args.output)} rows written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Precompute the AI's next move on a worker thread between rounds.
+
+The AI commits to its move before it sees the player's, so the move can be
+worked out as soon as the previous round resolves, while the result
+countdown is on screen. When the player clicks, the UI thread only picks
+up the finished move instead of running every strategy inside the frame.
+
+Run this module to measure the frame-time jitter the offload removes: it
+plays rounds in a simulated 60 FPS loop, with the AI's decision made
+inside the click frame (as before) or precomputed during the countdown.
+
+    python offload.py --history-size 5000
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from engine import MOVES, EnhancedPatternAI, Strategy
+from rng import BlockRNG
+
+
+class PredictionOffload:
+    """Runs get_ai_choice for the next round on a single worker thread.
+
+    Only one prediction is outstanding at a time and the AI is never
+    touched by the UI thread while it runs: take() waits for the move
+    before the round is played and add_move is called.
+    """
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ai-offload')
+        self.generation = 0  # Bumped by cancel(); older predictions are stale
+        self.pending = None  # (generation, ai, future)
+
+    def precompute(self, ai):
+        """Start working out ai's next move"""
+        self.pending = (self.generation, ai, self.executor.submit(ai.get_ai_choice))
+
+    def take(self, ai):
+        """The precomputed move for ai, waiting for it if needed; None if there is none"""
+        pending, self.pending = self.pending, None
+        if pending is None:
+            return None
+        generation, owner, future = pending
+        if generation != self.generation or owner is not ai:
+            return None
+        return future.result()
+
+    def wait(self):
+        """Block until the outstanding prediction is done, before changing the AI from this thread"""
+        if self.pending is not None:
+            wait([self.pending[2]])
+
+    def cancel(self):
+        """Drop the outstanding prediction, e.g. because the match was reset"""
+        self.generation += 1
+        if self.pending is not None:
+            self.pending[2].cancel()  # A prediction already running finishes on the old AI and is ignored
+            self.pending = None
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
+
+
+def _draw():
+    """Stand-in for a frame's blits"""
+    return sum(range(2000))
+
+
+def heavy_strategy(milliseconds):
+    """Strategy that burns CPU for milliseconds per prediction, standing in for a costly model"""
+    def predict(ai):
+        end = time.perf_counter() + milliseconds / 1000
+        while time.perf_counter() < end:
+            pass
+        return None
+    return Strategy('heavy', predict, weight=0.0)
+
+
+def measure_jitter(history_size=5000, rounds=200, frames_per_round=12, seed=0, offload=False, heavy_ms=0.0):
+    """Frame times (seconds) of a simulated 60 FPS loop playing rounds rounds.
+
+    Each round is one click frame followed by frames_per_round countdown
+    frames, and every frame does a fixed amount of drawing-like work.
+    Without offload the click frame also runs get_ai_choice; with it the
+    move is precomputed when the previous round resolves. A frame's time is
+    the work done on the UI thread, so it includes any wait for the GIL
+    while the worker runs. Returns (click frame times, countdown frame times).
+    """
+    player = BlockRNG(seed + 1)
+    ai = EnhancedPatternAI(history_size=history_size, rng=BlockRNG(seed))
+    if heavy_ms:
+        ai.add_strategy(heavy_strategy(heavy_ms))
+    for _ in range(history_size):
+        ai.add_move(player.choice(MOVES))
+
+    worker = PredictionOffload() if offload else None
+    frame_budget = 1 / 60
+    click_times = []
+    frame_times = []
+    if worker:
+        worker.precompute(ai)
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            ai_choice = worker.take(ai) if worker else None
+            if ai_choice is None:
+                ai_choice = ai.get_ai_choice()
+            ai.add_move(player.choice(MOVES))
+            if worker:
+                worker.precompute(ai)
+            _draw()
+            click_times.append(time.perf_counter() - start)
+            time.sleep(max(0.0, frame_budget - click_times[-1]))
+
+            for _ in range(frames_per_round):  # Countdown frames only draw
+                start = time.perf_counter()
+                _draw()
+                frame_times.append(time.perf_counter() - start)
+                time.sleep(max(0.0, frame_budget - frame_times[-1]))
+    finally:
+        if worker:
+            worker.shutdown()
+    return click_times, frame_times
+
+
+def summarize(frame_times):
+    ordered = sorted(frame_times)
+    return {
+        'p50_ms': ordered[len(ordered) // 2] * 1000,
+        'p99_ms': ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))] * 1000,
+        'max_ms': ordered[-1] * 1000,
+        'jitter_ms': statistics.pstdev(frame_times) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the frame-time jitter removed by precomputing AI moves")
+    parser.add_argument('--history-size', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--heavy-ms', type=float, default=0.0,
+                        help="add a strategy costing this many ms per prediction, like a heavier model")
+    args = parser.parse_args()
+
+    print("UI-thread work per frame, in ms")
+    print(f"{'mode':<12}{'frames':<11}{'p50':>8}{'p99':>8}{'max':>8}{'jitter':>8}")
+    for name, offload in (('inline', False), ('offloaded', True)):
+        clicks, countdown = measure_jitter(args.history_size, args.rounds, seed=args.seed, offload=offload,
+                                           heavy_ms=args.heavy_ms)
+        for frames, times in (('click', clicks), ('all', clicks + countdown)):
+            stats = summarize(times)
+            print(f"{name:<12}{frames:<11}{stats['p50_ms']:>8.3f}{stats['p99_ms']:>8.3f}{stats['max_ms']:>8.3f}"
+                  f"{stats['jitter_ms']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""Persistent, memory-mapped store of what the AI learned about each player.
+
+A profile holds a player's strategy weights and success stats and the
+Markov transition counts, so a returning player's AI starts warm instead
+of from scratch. The file is a fixed-layout open-addressing hash table:
+
+    header   magic, version, sizes, slot count, profile count and a JSON
+             layout (move names, Markov orders, strategy names)
+    slots    capacity fixed-size records:
+               key        u64   hash of the player id, 0 for an empty slot
+               sessions   u64   times the profile has been saved
+               weights    f32 x strategies
+               success    u32 x strategies
+               attempts   u32 x strategies
+               counts     u32 x moves^(order+1) per Markov order
+
+Loaded transition counts are scaled down to at most the AI's history_size
+per Markov order, so a profile warms the tables up like one full history
+window instead of accumulating a lifetime of rounds; saved cells are
+clamped to the u32 range.
+
+The file is memory-mapped, so lookups touch only the pages of the slots
+they probe and records are read through memoryview casts without copying
+the file. The table doubles (rewriting the file) when it gets 70% full.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+from itertools import product
+
+from engine import MOVES, STRATEGY_WEIGHTS
+
+MAGIC = b'RPSPROF1'
+VERSION = 1
+_HEADER = struct.Struct('<8sHHIQQI')  # magic, version, header size, record size, capacity, count, layout length
+_RECORD_HEAD = struct.Struct('<QQ')  # key, sessions
+_COUNT_OFFSET = 24  # Position of the profile count in the header
+MAX_LOAD = 0.7
+U32_MAX = 0xFFFFFFFF
+
+
+def player_key(player_id):
+    """Stable non-zero 64-bit key for a player id"""
+    key = int.from_bytes(hashlib.blake2b(str(player_id).encode(), digest_size=8).digest(), 'little')
+    return key or 1
+
+
+class ProfileStore:
+    def __init__(self, path, capacity=1024, markov_orders=(2, 3), strategies=tuple(STRATEGY_WEIGHTS), moves=MOVES):
+        """Open the store at path, creating it with the given layout if it does not exist"""
+        self.path = path
+        self.lock = threading.Lock()
+        if not os.path.exists(path):
+            layout = {'moves': list(moves), 'orders': list(markov_orders), 'strategies': list(strategies)}
+            self._create(path, layout, capacity)
+        self._open()
+
+    # -- file layout --
+
+    @staticmethod
+    def _record_size(layout):
+        n_strategies = len(layout['strategies'])
+        n_counts = sum(len(layout['moves']) ** (order + 1) for order in layout['orders'])
+        return _RECORD_HEAD.size + 12 * n_strategies + 4 * n_counts
+
+    @classmethod
+    def _create(cls, path, layout, capacity):
+        encoded = json.dumps(layout).encode()
+        header_size = -(-(_HEADER.size + len(encoded)) // 8) * 8  # Keep records 8-byte aligned
+        record_size = cls._record_size(layout)
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, header_size, record_size, capacity, 0, len(encoded)) + encoded)
+            f.truncate(header_size + capacity * record_size)
+
+    def _open(self):
+        self.file = open(self.path, 'r+b')
+        self.mm = mmap.mmap(self.file.fileno(), 0)
+        magic, version, self.header_size, self.record_size, self.capacity, self.count, layout_length = \
+            _HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} profile store")
+        self.layout = json.loads(self.mm[_HEADER.size:_HEADER.size + layout_length])
+        self.moves = self.layout['moves']
+        self.move_index = {move: i for i, move in enumerate(self.moves)}
+        self.strategy_names = self.layout['strategies']
+
+        # Offsets of each field inside a record
+        s = len(self.strategy_names)
+        self.weights_at = _RECORD_HEAD.size
+        self.success_at = self.weights_at + 4 * s
+        self.attempts_at = self.success_at + 4 * s
+        self.counts_at = {}
+        offset = self.attempts_at + 4 * s
+        for order in self.layout['orders']:
+            self.counts_at[order] = offset
+            offset += 4 * len(self.moves) ** (order + 1)
+
+    def close(self):
+        self.mm.flush()
+        self.mm.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, player_id):
+        return self._find(player_key(player_id))[1]
+
+    # -- hash table --
+
+    def _slot_offset(self, slot):
+        return self.header_size + slot * self.record_size
+
+    def _find(self, key):
+        """Return (slot, found) for key: its slot, or the empty slot where it would go"""
+        slot = key % self.capacity
+        while True:
+            stored = struct.unpack_from('<Q', self.mm, self._slot_offset(slot))[0]
+            if stored == key:
+                return slot, True
+            if stored == 0:
+                return slot, False
+            slot = (slot + 1) % self.capacity
+
+    def _grow(self, needed):
+        """Rewrite the store with enough slots for needed profiles"""
+        capacity = self.capacity
+        while needed > capacity * MAX_LOAD:
+            capacity *= 2
+        tmp_path = self.path + '.tmp'
+        self._create(tmp_path, self.layout, capacity)
+        with open(tmp_path, 'r+b') as f, mmap.mmap(f.fileno(), 0) as new:
+            for slot in range(self.capacity):
+                start = self._slot_offset(slot)
+                key = struct.unpack_from('<Q', self.mm, start)[0]
+                if key:
+                    target = key % capacity
+                    while struct.unpack_from('<Q', new, self.header_size + target * self.record_size)[0]:
+                        target = (target + 1) % capacity
+                    at = self.header_size + target * self.record_size
+                    new[at:at + self.record_size] = self.mm[start:start + self.record_size]
+            struct.pack_into('<Q', new, _COUNT_OFFSET, self.count)
+        self.close()
+        os.replace(tmp_path, self.path)
+        self._open()
+
+    # -- profiles --
+
+    def load(self, player_id, ai):
+        """Warm-start an EnhancedPatternAI from a stored profile; returns False if there is none"""
+        self._check_moves(ai)
+        with self.lock:
+            slot, found = self._find(player_key(player_id))
+            if not found:
+                return False
+            start = self._slot_offset(slot)
+            view = memoryview(self.mm)[start:start + self.record_size]
+            try:
+                self._read_into(view, ai)
+            finally:
+                view.release()
+        return True
+
+    def _check_moves(self, ai):
+        """Profiles only fit AIs playing the store's move set"""
+        if tuple(ai.moves) != tuple(self.moves):
+            raise ValueError(f"{self.path} stores {'/'.join(self.moves)} profiles, not {'/'.join(ai.moves)}")
+
+    def _read_into(self, view, ai):
+        s = len(self.strategy_names)
+        weights = view[self.weights_at:self.success_at].cast('f')
+        success = view[self.success_at:self.attempts_at].cast('I')
+        attempts = view[self.attempts_at:self.attempts_at + 4 * s].cast('I')
+        for i, name in enumerate(self.strategy_names):
+            slot = ai.slots.get(name)
+            if slot is not None and attempts[i]:
+                ai.weights[slot] = weights[i]
+                ai.successes[slot] = success[i]
+                ai.attempts[slot] = attempts[i]
+
+        for order, offset in self.counts_at.items():
+            if order not in ai.ngram_counts:
+                continue
+            n = len(self.moves) ** (order + 1)
+            counts = view[offset:offset + 4 * n].cast('I')
+            # Scale the stored counts to one history window so old matches fade out
+            total = sum(counts)
+            scale = min(1.0, ai.history_size / total) if total else 1.0
+            table = ai.ngram_counts[order]
+            for index, ngram in enumerate(product(self.moves, repeat=order + 1)):
+                count = int(counts[index] * scale)
+                if count:
+                    table[ngram[:-1]][ngram[-1]] += count
+
+    def save(self, player_id, ai):
+        self.save_many([(player_id, ai)])
+
+    def save_many(self, items):
+        """Write the profiles of several (player_id, ai) pairs in one pass"""
+        packed = [(player_key(player_id), self._pack(ai)) for player_id, ai in items]
+        with self.lock:
+            new_keys = {key for key, _ in packed if not self._find(key)[1]}
+            if self.count + len(new_keys) > self.capacity * MAX_LOAD:
+                self._grow(self.count + len(new_keys))
+            for key, record in packed:
+                slot, found = self._find(key)
+                start = self._slot_offset(slot)
+                if found:
+                    sessions = _RECORD_HEAD.unpack_from(self.mm, start)[1]
+                else:
+                    sessions = 0
+                    self.count += 1
+                _RECORD_HEAD.pack_into(record, 0, key, sessions + 1)
+                self.mm[start:start + self.record_size] = record
+            struct.pack_into('<Q', self.mm, _COUNT_OFFSET, self.count)
+
+    def _pack(self, ai):
+        """Encode an AI's learned state as one record; the key and session count are filled in on save"""
+        self._check_moves(ai)
+        record = bytearray(self.record_size)
+        view = memoryview(record)
+        weights = view[self.weights_at:self.success_at].cast('f')
+        success = view[self.success_at:self.attempts_at].cast('I')
+        attempts = view[self.attempts_at:self.attempts_at + 4 * len(self.strategy_names)].cast('I')
+        for i, name in enumerate(self.strategy_names):
+            slot = ai.slots.get(name)
+            if slot is not None:
+                weights[i] = ai.weights[slot]
+                success[i] = min(ai.successes[slot], U32_MAX)
+                attempts[i] = min(ai.attempts[slot], U32_MAX)
+
+        size = len(self.moves)
+        for order, offset in self.counts_at.items():
+            counts = view[offset:offset + 4 * size ** (order + 1)].cast('I')
+            for context, next_moves in ai.ngram_counts.get(order, {}).items():
+                index = 0
+                for move in context:
+                    index = index * size + self.move_index[move]
+                for move, count in next_moves.items():
+                    counts[index * size + self.move_index[move]] = min(count, U32_MAX)
+        return record
@@ -0,0 +1,115 @@
+"""Cached text surfaces and dirty-rectangle screen updates for the pygame client.
+
+The client still describes the whole frame every tick, but as cheap blits
+of cached surfaces: RenderCache only calls font.render for text it has not
+seen recently, and DirtyRenderer compares the frame with the previous one
+and repaints and pushes to the display only the regions that changed. A
+frame identical to the last one costs no drawing at all.
+"""
+from collections import OrderedDict
+
+import pygame
+
+
+class RenderCache:
+    """LRU cache of pre-rendered surfaces"""
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, factory):
+        """Surface cached under key, built with factory() on a miss"""
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.surfaces[key] = factory()
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def text(self, font, text, color):
+        """Antialiased text surface, rendered once per (text, font, color)"""
+        return self.get((text, font, color), lambda: font.render(text, True, color))
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+def _merge_rects(rects):
+    """Union overlapping rectangles so each pixel is repainted once"""
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        i = rect.collidelist(merged)
+        while i != -1:
+            rect.union_ip(merged.pop(i))
+            i = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+class DirtyRenderer:
+    """Collects a frame's blits and updates only the parts of the screen that changed.
+
+    Call blit() for everything on screen, back to front, then present().
+    With dirty=False every frame is redrawn in full and flipped, as before.
+    """
+    def __init__(self, screen, background, dirty=True):
+        self.screen = screen
+        self.background = background
+        self.dirty = dirty
+        self.ops = []  # This frame's (surface, rect) blits
+        self.previous = []
+        self.full_redraw = True  # Nothing has been drawn yet
+        self.frames_skipped = 0
+
+    def blit(self, surface, dest):
+        """Queue surface at a position (or a rect whose top-left is used)"""
+        rect = surface.get_rect(topleft=(dest[0], dest[1]))
+        self.ops.append((surface, tuple(rect)))
+        return rect
+
+    def invalidate(self):
+        """Redraw the whole screen next frame, e.g. after the window was exposed"""
+        self.full_redraw = True
+
+    def present(self):
+        """Draw the queued frame; returns the rectangles pushed to the display"""
+        ops, self.ops = self.ops, []
+        if not self.dirty or self.full_redraw:
+            self.full_redraw = False
+            self.previous = ops
+            self._paint(ops, None)
+            pygame.display.flip()
+            return [self.screen.get_rect()]
+
+        if ops == self.previous:
+            self.frames_skipped += 1
+            return []
+
+        # Regions where a blit appeared, moved, changed or disappeared
+        changed = set(ops).symmetric_difference(self.previous)
+        if not changed:  # Same blits in a new order
+            self.full_redraw = True
+            self.ops = ops
+            return self.present()
+        dirty = _merge_rects(rect for _, rect in changed)
+        self.previous = ops
+        for rect in dirty:
+            self._paint(ops, rect)
+        pygame.display.update(dirty)
+        return dirty
+
+    def _paint(self, ops, area):
+        """Repaint the background and every blit touching area (the whole screen if None)"""
+        self.screen.set_clip(area)
+        self.screen.fill(self.background)
+        for surface, rect in ops:
+            if area is None or area.colliderect(rect):
+                self.screen.blit(surface, rect)
+        self.screen.set_clip(None)
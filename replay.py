@@ -0,0 +1,247 @@
+"""Replay recorded player moves against alternative AI configurations.
+
+Each configuration plays a fresh EnhancedPatternAI against every stored
+move sequence, treating the recorded player moves as fixed, and the runs
+are compared by AI win rate and time per round. Sources are match logs
+(see matchlog.py, one sequence per session and match) or text files with
+one sequence per line, written as move names ("rock paper paper") or
+initials ("rpps"). Logs are replayed under the game they were played
+(see rules.RULESETS); text files are classic Rock-Paper-Scissors, and all
+sources of a run must be the same game.
+
+Work is split into (configuration, shard) tasks over a process pool; each
+task streams the sources itself and keeps at most --max-live sessions in
+memory, so memory stays bounded however large the corpus is.
+
+    python replay.py match_log.rpslog --config exploit_rate=0.7 --config history_size=25
+"""
+import argparse
+import os
+import time
+import zlib
+from collections import Counter, OrderedDict
+from multiprocessing import Pool
+
+from engine import MOVES, STRATEGY_WEIGHTS, WEIGHTING_SCHEMES, EnhancedPatternAI, determine_result
+from matchlog import MAGIC, iter_raw, read_layout
+from rng import BlockRNG
+from rules import RPS, RULESETS
+
+INITIALS = {move[0]: move for move in MOVES}
+
+# Settings a configuration may change and how to parse them from the command line
+SETTINGS = {
+    'history_size': int,
+    'exploit_rate': float,
+    'weight_floor': float,
+    'weight_scale': float,
+    'strategies': lambda value: tuple(value.split('+')),
+    'weighting': lambda value: WEIGHTING_SCHEMES[value](),
+}
+
+# Configurations compared when none are given: name -> settings
+DEFAULT_CONFIGS = {
+    'baseline': {},
+    'exploit_0.70': {'exploit_rate': 0.7},
+    'exploit_1.00': {'exploit_rate': 1.0},
+    'weight_floor_0': {'weight_floor': 0.0},
+    'weight_scale_1': {'weight_scale': 1.0},
+    'history_25': {'history_size': 25},
+    'history_100': {'history_size': 100},
+    'no_random': {'strategies': tuple(name for name in STRATEGY_WEIGHTS if name != 'random')},
+    'markov_only': {'strategies': ('markov_2', 'markov_3')},
+    'hedge': {'weighting': WEIGHTING_SCHEMES['hedge']()},
+    'decayed': {'weighting': WEIGHTING_SCHEMES['decayed']()},
+}
+
+
+def parse_config(spec):
+    """Parse "[name:]key=value,key=value" into (name, settings)"""
+    name, _, body = spec.rpartition(':')
+    settings = {}
+    for item in filter(None, body.split(',')):
+        key, _, value = item.partition('=')
+        if key not in SETTINGS:
+            raise ValueError(f"unknown setting {key!r}; expected one of {', '.join(SETTINGS)}")
+        settings[key] = SETTINGS[key](value)
+    return name or body or 'baseline', settings
+
+
+def make_ai(settings, rng=None, rules=RPS):
+    """EnhancedPatternAI built from a configuration's settings"""
+    options = {key: value for key, value in settings.items() if key != 'strategies'}
+    ai = EnhancedPatternAI(rng=rng, rules=rules, **options)
+    if 'strategies' in settings:
+        for name in list(ai.registry):
+            if name not in settings['strategies']:
+                ai.disable_strategy(name)
+    return ai
+
+
+def _parse_line(line):
+    tokens = line.replace(',', ' ').lower().split()
+    if len(tokens) == 1 and tokens[0] not in MOVES:
+        tokens = [INITIALS.get(letter, letter) for letter in tokens[0]]
+    for token in tokens:
+        if token not in MOVES:
+            raise ValueError(f"unknown move {token!r}")
+    return tokens
+
+
+def _is_log(path):
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def rules_of(paths):
+    """The Rules every source was played under; raises ValueError for unknown or mixed games"""
+    games = {}
+    for path in paths:
+        moves = tuple(read_layout(path)['moves']) if _is_log(path) else RPS.moves
+        rules = next((rules for rules in RULESETS.values() if rules.moves == moves), None)
+        if rules is None:
+            raise ValueError(f"{path} was played with unknown moves {'/'.join(moves)}")
+        games.setdefault(rules.name, []).append(path)
+    if len(games) > 1:
+        raise ValueError("sources mix games: " + "; ".join(f"{name}: {', '.join(paths)}"
+                                                           for name, paths in games.items()))
+    return RULESETS[next(iter(games))]
+
+
+def iter_moves(paths):
+    """Yield (sequence key, player move) for every recorded round, in file order.
+
+    Rounds of different sequences may interleave (a server log records many
+    sessions at once); each sequence's own rounds are in order.
+    """
+    for source, path in enumerate(paths):
+        if _is_log(path):
+            moves = read_layout(path)['moves']
+            for session, match, _, player, *_ in iter_raw(path):
+                yield (source, session, match), moves[player]
+        else:
+            with open(path) as f:
+                for number, line in enumerate(f):
+                    for move in _parse_line(line):
+                        yield (source, number), move
+
+
+def _shard_of(key, shards):
+    return zlib.crc32(repr(key).encode()) % shards
+
+
+def replay_task(task):
+    """Replay one shard of the sources against one configuration.
+
+    Returns (config name, Counter of AI results, sequences, seconds spent in the AI).
+    """
+    name, settings, paths, shard, shards, seed, max_live, rules = task
+    live = OrderedDict()  # Sequence key -> AI, least recently played first
+    results = Counter()
+    sequences = 0
+    busy = 0.0
+    for key, move in iter_moves(paths):
+        if shards > 1 and _shard_of(key, shards) != shard:
+            continue
+        ai = live.get(key)
+        if ai is None:
+            if len(live) >= max_live:
+                live.popitem(last=False)  # Treat the stalest sequence as finished
+            # Seeded per sequence, so results do not depend on sharding
+            sequence_seed = zlib.crc32(repr((seed, name, key)).encode())
+            ai = live[key] = make_ai(settings, BlockRNG(sequence_seed), rules)
+            sequences += 1
+        else:
+            live.move_to_end(key)
+        start = time.perf_counter()
+        ai_move = ai.get_ai_choice()
+        ai.add_move(move)
+        busy += time.perf_counter() - start
+        results[determine_result(move, ai_move, rules)] += 1
+    # Results are from the player's side; flip them to the AI's
+    return name, Counter(win=results['lose'], draw=results['draw'], loss=results['win']), sequences, busy
+
+
+def run_replay(paths, configs, workers=None, shards=None, seed=0, max_live=1024):
+    """Replay the sources against every configuration; returns {name: stats dict} in config order"""
+    rules = rules_of(paths)
+    workers = workers or os.cpu_count()
+    if shards is None:
+        shards = max(1, -(-workers // len(configs)))  # Enough tasks to keep every worker busy
+    tasks = [(name, settings, paths, shard, shards, seed, max_live, rules)
+             for name, settings in configs.items() for shard in range(shards)]
+
+    totals = {name: {'results': Counter(), 'sequences': 0, 'seconds': 0.0} for name in configs}
+    if workers == 1:
+        for output in map(replay_task, tasks):
+            _merge(totals, output)
+    else:
+        with Pool(workers) as pool:
+            for output in pool.imap_unordered(replay_task, tasks):
+                _merge(totals, output)
+
+    report = {}
+    for name, total in totals.items():
+        results = total['results']
+        rounds = sum(results.values())
+        report[name] = {
+            'settings': configs[name],
+            'sequences': total['sequences'],
+            'rounds': rounds,
+            'win': results['win'] / rounds if rounds else 0.0,
+            'draw': results['draw'] / rounds if rounds else 0.0,
+            'loss': results['loss'] / rounds if rounds else 0.0,
+            'us_per_round': total['seconds'] / rounds * 1e6 if rounds else 0.0,
+        }
+    return report
+
+
+def _merge(totals, output):
+    name, results, sequences, seconds = output
+    totals[name]['results'].update(results)
+    totals[name]['sequences'] += sequences
+    totals[name]['seconds'] += seconds
+
+
+def format_report(report):
+    baseline = next(iter(report.values()))['win']
+    lines = [f"{'config':<18}{'rounds':>10}{'AI win':>9}{'vs first':>10}{'draw':>8}{'AI loss':>9}{'us/round':>10}"]
+    for name, entry in report.items():
+        lines.append(f"{name:<18}{entry['rounds']:>10,}{entry['win']:>9.1%}{entry['win'] - baseline:>+10.1%}"
+                     f"{entry['draw']:>8.1%}{entry['loss']:>9.1%}{entry['us_per_round']:>10.1f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('sources', nargs='+', help="match logs or text files of move sequences")
+    parser.add_argument('--config', action='append', default=[],
+                        help="configuration as [name:]key=value,... with keys " + ", ".join(SETTINGS)
+                             + " (strategies joined with +, weighting one of " + ", ".join(WEIGHTING_SCHEMES)
+                             + "); repeatable. Default: a built-in sweep")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--shards', type=int, help="sequence shards per configuration (default: fill the workers)")
+    parser.add_argument('--max-live', type=int, default=1024, help="sessions kept in memory per task")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.config:
+        configs = {'baseline': {}}
+        try:
+            configs.update(parse_config(spec) for spec in args.config)
+        except (KeyError, ValueError) as e:
+            parser.error(str(e))
+    else:
+        configs = DEFAULT_CONFIGS
+
+    start = time.perf_counter()
+    try:
+        report = run_replay(args.sources, configs, args.workers, args.shards, args.seed, args.max_live)
+    except ValueError as e:
+        parser.error(str(e))
+    print(format_report(report))
+    print(f"replayed {len(configs)} configurations in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Per-session random number source for the AI.
+
+BlockRNG draws uniform floats a block at a time and hands them out one by
+one, so each session owns its random state (sessions can run on any
+thread or process without sharing the global random module) and a seed
+replays a session exactly. A random.Random fills each block by default;
+with use_numpy=True a block is one call to a numpy Generator instead.
+NumPy is only imported then, so importing the engine stays fast. The two
+backends produce different streams for the same seed, so a run replays
+exactly with the same seed and the same backend.
+"""
+import random
+from array import array
+
+BLOCK = 256  # Draws generated per refill
+
+
+class BlockRNG:
+    """Seedable source of random(), randrange() and choice() with block-buffered draws"""
+    def __init__(self, seed=None, block=BLOCK, use_numpy=False):
+        self.seed = seed
+        self.block = block
+        if use_numpy:
+            import numpy  # Deferred: numpy costs far more to import than the rest of the engine
+            generator = numpy.random.default_rng(seed)
+            self._generate = lambda: array('d', generator.random(block).tobytes())
+        else:
+            generator = random.Random(seed)
+            self._generate = lambda: array('d', [generator.random() for _ in range(block)])
+        self.draws = iter(self._generate())
+
+    def _refill(self):
+        """Start a new block and return its first draw"""
+        self.draws = iter(self._generate())
+        return next(self.draws)
+
+    def random(self):
+        """Float in [0, 1)"""
+        try:
+            return next(self.draws)
+        except StopIteration:
+            return self._refill()
+
+    def randrange(self, n):
+        """Integer in [0, n)"""
+        try:
+            return int(next(self.draws) * n)
+        except StopIteration:
+            return int(self._refill() * n)
+
+    def choice(self, sequence):
+        try:
+            return sequence[int(next(self.draws) * len(sequence))]
+        except StopIteration:
+            return sequence[int(self._refill() * len(sequence))]
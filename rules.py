@@ -0,0 +1,78 @@
+"""Move sets and outcome tables for Rock-Paper-Scissors style games.
+
+A Rules object describes a cyclic game with an odd number N of moves:
+in move order, each move beats the (N - 1) / 2 moves before it and loses
+to the (N - 1) / 2 after it, so every move wins, loses and draws against
+the same number of moves. Rock-Paper-Scissors is N = 3 and
+Rock-Paper-Scissors-Lizard-Spock is N = 5 in the order
+rock, spock, paper, lizard, scissors.
+
+The outcome of every pair of moves and the counter to every move are
+precomputed, so lookups are O(1) and a game's tables take O(N^2) memory.
+"""
+
+RESULTS = ('draw', 'win', 'lose')  # Outcome codes in the table, from the first move's point of view
+
+
+class Rules:
+    """Moves, N x N outcome table and counter-move index of an odd-N cyclic game"""
+    def __init__(self, moves, name=None):
+        moves = tuple(moves)
+        n = len(moves)
+        if n < 3 or n % 2 == 0:
+            raise ValueError(f"a cyclic game needs an odd number of moves (at least 3), got {n}")
+        if len(set(moves)) != n:
+            raise ValueError("move names must be unique")
+        self.name = name or "-".join(moves)
+        self.moves = moves
+        self.size = n
+        self.index = {move: i for i, move in enumerate(moves)}
+
+        # outcome[a * n + b] is the result of playing move a against move b
+        half = (n - 1) // 2
+        table = bytearray(n * n)
+        for a in range(n):
+            for k in range(1, half + 1):
+                table[a * n + (a - k) % n] = 1  # a beats the half moves before it
+                table[a * n + (a + k) % n] = 2  # and loses to the half after it
+        self.outcome = bytes(table)
+
+        # The counter to a move is the next move in order, which beats it
+        self.counter_index = tuple((i + 1) % n for i in range(n))
+        self.counter_moves = {move: moves[(i + 1) % n] for i, move in enumerate(moves)}
+
+    def __repr__(self):
+        return f"Rules({self.moves!r})"
+
+    def result(self, player_move, ai_move):
+        """'win', 'lose' or 'draw' from the player's point of view"""
+        return RESULTS[self.outcome[self.index[player_move] * self.size + self.index[ai_move]]]
+
+    def beats(self, move, other):
+        return self.outcome[self.index[move] * self.size + self.index[other]] == 1
+
+    def counter(self, move):
+        """A move that beats move"""
+        return self.counter_moves[move]
+
+    def beaten_by(self, move):
+        """Every move that beats move"""
+        i = self.index[move]
+        return tuple(self.moves[(i + k) % self.size] for k in range(1, (self.size - 1) // 2 + 1))
+
+
+def cyclic(n):
+    """Rules for an n-move cyclic game with moves named move_0 ... move_{n-1}"""
+    return Rules([f"move_{i}" for i in range(n)], name=f"cyclic_{n}")
+
+
+RPS = Rules(('rock', 'paper', 'scissors'), name='rps')
+RPSLS = Rules(('rock', 'spock', 'paper', 'lizard', 'scissors'), name='rpsls')
+
+# Games by name, for command-line options
+RULESETS = {
+    'rps': RPS,
+    'rpsls': RPSLS,
+    'cyclic_7': cyclic(7),
+    'cyclic_9': cyclic(9),
+}
@@ -0,0 +1,168 @@
+"""Brute-force self-checks for the engine's incremental structures.
+
+Feeds random and patterned move streams to PeriodicityDetector and
+SuffixAutomaton, directly (with limits small enough to force automaton
+rebuilds) and through an EnhancedPatternAI whose history window is much
+shorter than the stream, and compares every step with a direct
+recomputation from the stream. Prints a line per check and exits with status 1 on
+the first mismatch, so it can gate changes to these structures.
+
+    python selfcheck.py
+    python selfcheck.py --seed 3 --streams 50 --length 2000
+"""
+import argparse
+import random
+import sys
+
+from engine import EnhancedPatternAI, PeriodicityDetector, SuffixAutomaton
+from rng import BlockRNG
+from rules import RPS, RPSLS
+
+
+def make_streams(rng, moves, count, length):
+    """Move streams to check against: uniformly random, then patterns with noise"""
+    streams = [[rng.choice(moves) for _ in range(length)], [moves[0]] * length]
+    while len(streams) < count:
+        pattern = [rng.choice(moves) for _ in range(rng.randint(1, 40))]
+        stream = []
+        while len(stream) < length:
+            if rng.random() < 0.8:
+                stream.extend(pattern)
+            else:
+                stream.extend(rng.choice(moves) for _ in range(rng.randint(1, 5)))
+        streams.append(stream[:length])
+    return streams
+
+
+def brute_run(stream, period):
+    """How many of the latest moves in a row equal the move period steps earlier"""
+    t = len(stream) - 1
+    run = 0
+    while t - run - period >= 0 and stream[t - run] == stream[t - run - period]:
+        run += 1
+    return run
+
+
+def brute_detected(stream, max_period):
+    """Every period whose streak covers it, shortest first"""
+    return [period for period in range(1, max_period + 1) if brute_run(stream, period) >= period]
+
+
+def check_periodicity(stream, detector):
+    """Compare detector (fed stream move by move) with a recomputation; returns a mismatch or None"""
+    max_period = detector.max_period
+    probes = sorted({1, 2, 3, detector.key_length, detector.key_length + 1, max_period} & set(range(1, max_period + 1)))
+    for t, move in enumerate(stream):
+        detector.add(move)
+        seen = stream[:t + 1]
+        expected = brute_detected(seen, max_period)
+        if detector.detected != expected:
+            return f"move {t}: detected {detector.detected}, expected {expected}"
+        for period in probes:
+            if detector.run(period) != brute_run(seen, period):
+                return f"move {t}: run({period}) = {detector.run(period)}, expected {brute_run(seen, period)}"
+            if period <= t + 1 and detector.next_move(period) != seen[t + 1 - period]:
+                return f"move {t}: next_move({period}) = {detector.next_move(period)}, expected {seen[t + 1 - period]}"
+    return None
+
+
+def check_ai_periodicity(stream, rules, history_size, seed):
+    """The periodicity feature of an AI with a short history still sees the whole stream"""
+    ai = EnhancedPatternAI(history_size=history_size, rng=BlockRNG(seed), rules=rules)
+    for t, move in enumerate(stream):
+        ai.get_ai_choice()
+        ai.add_move(move)
+        detected = ai.features['periodicity'].detected
+        expected = brute_detected(stream[:t + 1], ai.max_period)
+        if detected != expected:
+            return f"move {t}: detected {detected}, expected {expected}"
+    return None
+
+
+def brute_sequence_match(indexed, moves):
+    """Move that followed the first earlier occurrence of the longest repeated suffix, or None"""
+    codes = bytes(moves.index(move) for move in indexed)
+    for length in range(len(codes) - 1, 0, -1):
+        start = codes.find(codes[-length:])  # First occurrence; the suffix itself if there is no earlier one
+        if start + length < len(codes):
+            return moves[codes[start + length]]
+    return None
+
+
+def check_suffix_automaton(stream, moves, limit):
+    """Compare a SuffixAutomaton's prediction with a recomputation over the moves it indexes"""
+    automaton = SuffixAutomaton(moves, limit)
+    indexed = []
+    for t, move in enumerate(stream):
+        if len(indexed) >= limit:
+            indexed = indexed[len(indexed) - limit // 2:]  # Mirrors the automaton's rebuild
+        indexed.append(move)
+        automaton.add(move)
+        expected = brute_sequence_match(indexed, moves)
+        if automaton.predict() != expected:
+            return f"move {t}: predicted {automaton.predict()}, expected {expected}"
+    return None
+
+
+def check_ai_sequence_match(stream, rules, history_size, context_limit, seed):
+    """The sequence_match strategy of an AI with a short history matches against the indexed moves"""
+    ai = EnhancedPatternAI(history_size=history_size, context_limit=context_limit, rng=BlockRNG(seed), rules=rules)
+    indexed = []
+    for t, move in enumerate(stream):
+        ai.get_ai_choice()
+        ai.add_move(move)
+        if len(indexed) >= context_limit:
+            indexed = indexed[len(indexed) - context_limit // 2:]
+        indexed.append(move)
+        predicted = ai.predict_sequence_match()
+        expected = brute_sequence_match(indexed, rules.moves)
+        if predicted != expected:
+            return f"move {t}: predicted {predicted}, expected {expected}"
+    return None
+
+
+def run_checks(seed=0, streams=10, length=600):
+    """Run every check; returns the number of failures"""
+    rng = random.Random(seed)
+    checks = []
+    for rules in (RPS, RPSLS):
+        for stream in make_streams(rng, rules.moves, streams, length):
+            for max_period, key_length in ((1, 4), (3, 4), (16, 1), (16, 4), (64, 2), (64, 4), (200, 4)):
+                checks.append((f"periodicity {rules.name} max_period={max_period} key_length={key_length}",
+                               lambda stream=stream, m=max_period, k=key_length:
+                               check_periodicity(stream, PeriodicityDetector(m, k))))
+            checks.append((f"periodicity via EnhancedPatternAI {rules.name} history_size=20",
+                           lambda stream=stream, rules=rules: check_ai_periodicity(stream, rules, 20, seed)))
+            for limit in (2, 3, 17, 64, 1000):
+                checks.append((f"suffix automaton {rules.name} limit={limit}",
+                               lambda stream=stream, rules=rules, limit=limit:
+                               check_suffix_automaton(stream, rules.moves, limit)))
+            checks.append((f"suffix automaton via EnhancedPatternAI {rules.name} history_size=20 context_limit=100",
+                           lambda stream=stream, rules=rules: check_ai_sequence_match(stream, rules, 20, 100, seed)))
+
+    failures = 0
+    passed = {}
+    for name, check in checks:
+        problem = check()
+        if problem:
+            failures += 1
+            print(f"FAIL {name}: {problem}")
+        else:
+            passed[name] = passed.get(name, 0) + 1
+    for name, count in passed.items():
+        print(f"ok   {name} ({count} streams)")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--streams', type=int, default=10, help="streams per move set")
+    parser.add_argument('--length', type=int, default=600, help="moves per stream")
+    args = parser.parse_args()
+    if run_checks(args.seed, args.streams, args.length):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Asyncio TCP server hosting many Rock-Paper-Scissors matches at once.
+
+Each connection gets its own GameState (and so its own EnhancedPatternAI).
+The protocol is one command per line: a move name plays a round, "reset"
+starts a new match, "player <name>" switches to that player's stored
+profile (with --profiles), "stats" returns server statistics and "quit"
+closes the connection. Every reply is one line of JSON. AI work runs on a
+thread pool so the event loop never waits on a prediction. With --log every
+round is appended to a match log (see matchlog.py), one session per connection.
+--rules picks the game, e.g. rpsls for Rock-Paper-Scissors-Lizard-Spock.
+
+    python server.py --port 5050
+    python server.py --rules rpsls
+    python server.py --loadtest --p99-target-ms 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from engine import MOVES, GameState
+from matchlog import MatchLogWriter
+from profiles import ProfileStore
+from rules import RPS, RULESETS
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+class ServerStats:
+    """Session and round counters plus a window of recent round latencies"""
+    def __init__(self, window=10000):
+        self.started = time.perf_counter()
+        self.sessions_total = 0
+        self.sessions_active = 0
+        self.rounds = 0
+        self.latencies = deque(maxlen=window)  # Seconds from request to reply
+
+    def snapshot(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            'sessions_total': self.sessions_total,
+            'sessions_active': self.sessions_active,
+            'rounds': self.rounds,
+            'rounds_per_second': self.rounds / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(self.latencies, 0.50) * 1000,
+            'p99_ms': percentile(self.latencies, 0.99) * 1000,
+        }
+
+
+class GameServer:
+    def __init__(self, host='127.0.0.1', port=5050, workers=None, max_rounds=None, profiles=None, log=None,
+                 rules=RPS):
+        self.host = host
+        self.port = port
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.max_rounds = max_rounds
+        self.profiles = profiles  # Optional ProfileStore for warm-starting returning players
+        self.log = log  # Optional MatchLogWriter recording every round
+        self.rules = rules  # Game every connection plays
+        self.stats = ServerStats()
+        self.server = None
+        self.connections = {}  # Handler task -> its StreamWriter, while the connection is open
+
+    def new_game(self, session_id=0):
+        if self.max_rounds:
+            return GameState(self.max_rounds, profiles=self.profiles, log=self.log, session_id=session_id,
+                             rules=self.rules)
+        return GameState(profiles=self.profiles, log=self.log, session_id=session_id, rules=self.rules)
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]  # Resolve port 0
+        return self.server
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        # Hang up on open connections and let every handler finish (and save) before the executor goes
+        for writer in self.connections.values():
+            writer.close()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+        self.executor.shutdown(wait=False)
+        if self.log is not None:
+            self.log.flush()
+
+    async def handle_client(self, reader, writer):
+        self.stats.sessions_total += 1
+        self.stats.sessions_active += 1
+        loop = asyncio.get_running_loop()
+        self.connections[asyncio.current_task()] = writer
+        game = None
+        try:
+            # Loading a profile reads the store, so build the game off the event loop too
+            game = await loop.run_in_executor(self.executor, self.new_game, self.stats.sessions_total)
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                start = time.perf_counter()
+                text = line.decode(errors='replace').strip()
+                command = text.lower()
+
+                if command == 'quit':
+                    break
+                elif command == 'reset':
+                    await loop.run_in_executor(self.executor, game.reset)
+                    reply = {'reset': True}
+                elif command.startswith('player '):
+                    player_id = text[len('player '):].strip()
+                    await loop.run_in_executor(self.executor, game.set_player, player_id)
+                    reply = {'player': player_id, 'profile': self.profiles is not None}
+                elif command == 'stats':
+                    reply = self.stats.snapshot()
+                elif command in self.rules.index:
+                    reply = await loop.run_in_executor(self.executor, self.play_round, game, command)
+                    self.stats.rounds += 1
+                    self.stats.latencies.append(time.perf_counter() - start)
+                else:
+                    reply = {'error': f"unknown command {command!r}"}
+
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.stats.sessions_active -= 1
+            writer.close()
+            try:
+                if game is not None and self.profiles is not None:
+                    await loop.run_in_executor(self.executor, game.save_profile)
+            finally:
+                del self.connections[asyncio.current_task()]
+
+    @staticmethod
+    def play_round(game, move):
+        """Play one round with the shared set_player_choice rules; runs on the thread pool"""
+        game.reset_round()
+        result = game.play_round(move)
+        if result is None:
+            return {'error': "game over, send reset to play again"}
+        return {
+            'round': game.rounds_played,
+            'player': game.player_choice,
+            'ai': game.ai_choice,
+            'result': result,
+            'player_score': game.player_score,
+            'ai_score': game.ai_score,
+            'draws': game.draws,
+            'game_over': game.game_over,
+        }
+
+
+async def run_client(host, port, rounds, seed, latencies):
+    """Loopback client playing rounds moves from a simple biased pattern"""
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    pattern = [rng.choice(MOVES) for _ in range(rng.randint(1, 5))]
+    for i in range(rounds):
+        move = pattern[i % len(pattern)] if rng.random() < 0.7 else rng.choice(MOVES)
+        start = time.perf_counter()
+        writer.write(move.encode() + b"\n")
+        reply = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - start)
+        if reply.get('game_over'):
+            writer.write(b"reset\n")
+            await reader.readline()
+    writer.write(b"quit\n")
+    writer.close()
+    await writer.wait_closed()
+
+
+async def loadtest(clients_steps, rounds, p99_target_ms, workers=None, seed=0):
+    """Ramp the number of concurrent clients and report throughput at each level"""
+    server = GameServer(port=0, workers=workers)
+    await server.start()
+    best = None
+    try:
+        for clients in clients_steps:
+            latencies = []
+            start = time.perf_counter()
+            await asyncio.gather(*(run_client(server.host, server.port, rounds, seed + i, latencies)
+                                   for i in range(clients)))
+            elapsed = time.perf_counter() - start
+            p99_ms = percentile(latencies, 0.99) * 1000
+            rate = len(latencies) / elapsed
+            within = p99_ms <= p99_target_ms
+            print(f"{clients:>6} clients {rate:>10,.0f} rounds/s  p50 {percentile(latencies, 0.5) * 1000:6.2f} ms"
+                  f"  p99 {p99_ms:6.2f} ms{'' if within else '  (over target)'}")
+            if within and (best is None or rate > best[1]):
+                best = (clients, rate)
+        stats = server.stats.snapshot()
+    finally:
+        await server.close()
+
+    print(f"sessions handled: {stats['sessions_total']}, rounds: {stats['rounds']}")
+    if best:
+        print(f"best within p99 <= {p99_target_ms} ms: {best[1]:,.0f} rounds/s with {best[0]} concurrent sessions")
+    else:
+        print(f"no load level met p99 <= {p99_target_ms} ms")
+    return best
+
+
+async def serve(host, port, workers, profiles_path=None, log_path=None, rules=RPS):
+    profiles = ProfileStore(profiles_path, moves=rules.moves) if profiles_path else None
+    log = MatchLogWriter(log_path, moves=rules.moves) if log_path else None
+    server = GameServer(host, port, workers, profiles=profiles, log=log, rules=rules)
+    await server.start()
+    print(f"Serving on {server.host}:{server.port}")
+    try:
+        async with server.server:
+            await server.server.serve_forever()
+    finally:
+        if log is not None:
+            log.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5050)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="prediction threads")
+    parser.add_argument('--profiles', help="player profile store file for warm-starting returning players")
+    parser.add_argument('--log', help="match log file to append every round to")
+    parser.add_argument('--rules', choices=RULESETS, default='rps', help="game variant to serve")
+    parser.add_argument('--loadtest', action='store_true', help="run a loopback load test instead of serving")
+    parser.add_argument('--clients', default="1,10,50,100,200,500", help="concurrency levels for --loadtest")
+    parser.add_argument('--rounds', type=int, default=100, help="rounds per client in --loadtest")
+    parser.add_argument('--p99-target-ms', type=float, default=20.0)
+    args = parser.parse_args()
+
+    if args.loadtest:
+        steps = [int(n) for n in args.clients.split(",")]
+        asyncio.run(loadtest(steps, args.rounds, args.p99_target_ms, args.workers))
+    else:
+        asyncio.run(serve(args.host, args.port, args.workers, args.profiles, args.log, RULESETS[args.rules]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Headless self-play harness for evaluating EnhancedPatternAI.
+
+Plays the AI against a library of scripted opponents, spreading matches
+over a process pool, and reports AI win/draw/loss rates with 95% Wilson
+confidence intervals plus rounds per second. Every match gets its own
+seed derived from the run seed, so results do not depend on the number of
+workers or on how matches are scheduled.
+
+    python simulate.py --rounds 1000000 --workers 8
+"""
+import argparse
+import json
+import math
+import os
+import random
+import time
+from collections import Counter
+from multiprocessing import Pool
+
+from engine import MOVES, EnhancedPatternAI, determine_result
+from rng import BlockRNG
+
+
+class ConstantOpponent:
+    """Always plays the same move"""
+    def __init__(self, rng, move='rock'):
+        self.move = move
+
+    def next_move(self):
+        return self.move
+
+    def observe(self, own_move, ai_move):
+        pass
+
+
+class CycleOpponent:
+    """Plays a fixed sequence over and over (RPS loops, ABAB, ABCABC, ...)"""
+    def __init__(self, rng, sequence=MOVES):
+        self.sequence = sequence
+        self.position = rng.randrange(len(sequence))  # Random starting phase
+
+    def next_move(self):
+        move = self.sequence[self.position]
+        self.position = (self.position + 1) % len(self.sequence)
+        return move
+
+    def observe(self, own_move, ai_move):
+        pass
+
+
+class BiasedRandomOpponent:
+    """Draws moves independently with fixed probabilities"""
+    def __init__(self, rng, weights=(0.5, 0.3, 0.2)):
+        self.rng = rng
+        self.weights = weights
+
+    def next_move(self):
+        return self.rng.choices(MOVES, self.weights)[0]
+
+    def observe(self, own_move, ai_move):
+        pass
+
+
+class MarkovOpponent:
+    """Picks its next move from a transition table keyed by its previous move"""
+    def __init__(self, rng, stickiness=0.6):
+        self.rng = rng
+        # Each row favours one successor; the favourite is random per match
+        self.transitions = {}
+        for move in MOVES:
+            favourite = rng.choice(MOVES)
+            self.transitions[move] = [stickiness if m == favourite else (1 - stickiness) / 2 for m in MOVES]
+        self.previous = rng.choice(MOVES)
+
+    def next_move(self):
+        return self.rng.choices(MOVES, self.transitions[self.previous])[0]
+
+    def observe(self, own_move, ai_move):
+        self.previous = own_move
+
+
+class CounterAIOpponent:
+    """Runs its own EnhancedPatternAI on the AI's moves and plays the counter"""
+    def __init__(self, rng):
+        self.model = EnhancedPatternAI(rng=BlockRNG(rng.getrandbits(64)))
+
+    def next_move(self):
+        return self.model.get_ai_choice()
+
+    def observe(self, own_move, ai_move):
+        self.model.add_move(ai_move)
+
+
+# Opponent library: name -> factory taking a random.Random
+OPPONENTS = {
+    'constant': ConstantOpponent,
+    'cycle_rps': CycleOpponent,
+    'cycle_rrpss': lambda rng: CycleOpponent(rng, ('rock', 'rock', 'paper', 'scissors', 'scissors')),
+    'alternating_ab': lambda rng: CycleOpponent(rng, ('rock', 'paper')),
+    'alternating_abc': lambda rng: CycleOpponent(rng, ('scissors', 'rock', 'rock')),
+    'biased_random': BiasedRandomOpponent,
+    'uniform_random': lambda rng: BiasedRandomOpponent(rng, (1, 1, 1)),
+    'markov': MarkovOpponent,
+    'counter_ai': CounterAIOpponent,
+}
+
+
+def match_seed(base_seed, opponent, match_index):
+    """Deterministic seed for one match, independent of worker scheduling"""
+    return random.Random(f"{base_seed}:{opponent}:{match_index}").getrandbits(64)
+
+
+def play_match(task):
+    """Play one match and return (opponent, Counter of AI results, elapsed seconds)"""
+    opponent_name, rounds, seed, history_size = task
+    ai = EnhancedPatternAI(history_size=history_size, rng=BlockRNG(seed))
+    opponent = OPPONENTS[opponent_name](random.Random(seed + 1))
+    results = Counter()
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        ai_move = ai.get_ai_choice()
+        move = opponent.next_move()
+        ai.add_move(move)
+        opponent.observe(move, ai_move)
+        results[determine_result(move, ai_move)] += 1
+    elapsed = time.perf_counter() - start
+
+    # Results are from the opponent's side; flip them to the AI's
+    return opponent_name, Counter(win=results['lose'], draw=results['draw'], loss=results['win']), elapsed
+
+
+def wilson_interval(successes, trials, z=1.96):
+    """95% Wilson score interval for a binomial proportion"""
+    if trials == 0:
+        return 0.0, 0.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return centre - margin, centre + margin
+
+
+def run_simulation(opponents, rounds, match_rounds=1000, workers=None, seed=0, history_size=50):
+    """Play rounds rounds against each opponent and return a report dict"""
+    tasks = []
+    for name in opponents:
+        remaining, index = rounds, 0
+        while remaining > 0:
+            length = min(match_rounds, remaining)
+            tasks.append((name, length, match_seed(seed, name, index), history_size))
+            remaining -= length
+            index += 1
+
+    totals = {name: Counter() for name in opponents}
+    start = time.perf_counter()
+    if workers == 1:
+        for name, results, _ in map(play_match, tasks):
+            totals[name].update(results)
+    else:
+        with Pool(workers) as pool:
+            for name, results, _ in pool.imap_unordered(play_match, tasks, chunksize=4):
+                totals[name].update(results)
+    wall = time.perf_counter() - start
+
+    report = {'seed': seed, 'rounds_per_opponent': rounds, 'match_rounds': match_rounds,
+              'history_size': history_size, 'wall_seconds': wall,
+              'rounds_per_second': rounds * len(opponents) / wall if wall else 0.0,
+              'opponents': {}}
+    for name, results in totals.items():
+        played = sum(results.values())
+        entry = {'rounds': played}
+        for outcome in ('win', 'draw', 'loss'):
+            low, high = wilson_interval(results[outcome], played)
+            entry[outcome] = {'rate': results[outcome] / played, 'ci95': [low, high]}
+        report['opponents'][name] = entry
+    return report
+
+
+def format_report(report):
+    lines = [f"{'opponent':<18}{'AI win':>22}{'draw':>22}{'AI loss':>22}"]
+    for name, entry in report['opponents'].items():
+        cells = []
+        for outcome in ('win', 'draw', 'loss'):
+            rate, (low, high) = entry[outcome]['rate'], entry[outcome]['ci95']
+            cells.append(f"{rate:6.1%} [{low:6.1%},{high:6.1%}]")
+        lines.append(f"{name:<18}" + "".join(f"{cell:>22}" for cell in cells))
+    lines.append(f"{report['rounds_per_second']:,.0f} rounds/s over {report['wall_seconds']:.1f}s")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=100000, help="rounds per opponent")
+    parser.add_argument('--match-rounds', type=int, default=1000, help="rounds per match before the AI is reset")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--history-size', type=int, default=50)
+    parser.add_argument('--opponents', default=",".join(OPPONENTS),
+                        help="comma-separated subset of: " + ", ".join(OPPONENTS))
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+
+    opponents = args.opponents.split(",")
+    unknown = [name for name in opponents if name not in OPPONENTS]
+    if unknown:
+        parser.error(f"unknown opponents: {', '.join(unknown)}")
+
+    report = run_simulation(opponents, args.rounds, args.match_rounds, args.workers, args.seed, args.history_size)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
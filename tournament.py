@@ -0,0 +1,240 @@
+"""Round-robin tournament between EnhancedPatternAI variants.
+
+Every pair of registered bots plays --matches long matches on a process
+pool. Ratings are a Bradley-Terry fit over all rounds (a draw counts half)
+on the Elo scale, so they do not depend on the order matches finish in.
+The random bot is pinned at 1500 (it scores 50% against anything), which
+keeps ratings comparable between runs with different fields; without it
+the field averages 1500. The report also gives each bot's time per
+move and the tournament's throughput.
+
+Saved reports double as a regression gate: with --compare, a bot whose
+rating drops or whose time per move grows past the thresholds is flagged
+and the run exits with status 1.
+
+    python tournament.py --output before.json
+    python tournament.py --compare before.json --bots full,random,only_markov_2
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from itertools import combinations
+from multiprocessing import Pool
+
+from engine import MOVES, DEFAULT_STRATEGIES, EnhancedPatternAI, HedgeWeights, DecayedAccuracy, determine_result
+from rng import BlockRNG
+
+ANCHOR = 'random'  # Bot rated 1500 when it plays
+MIN_SLOWDOWN_US = 2.0  # Smaller per-move slowdowns are timing noise, whatever the ratio
+
+
+class RandomBot:
+    """Uniformly random moves"""
+    def __init__(self, rng):
+        self.rng = rng
+
+    def get_ai_choice(self):
+        return self.rng.choice(MOVES)
+
+    def add_move(self, move):
+        pass
+
+
+def single_strategy(name):
+    """Factory for an EnhancedPatternAI voting with only one strategy"""
+    def factory(rng):
+        ai = EnhancedPatternAI(rng=rng)
+        for other in list(ai.registry):
+            if other != name:
+                ai.disable_strategy(other)
+        return ai
+    return factory
+
+
+# Bot library: name -> factory taking the bot's BlockRNG. A bot plays
+# get_ai_choice() and learns from add_move(opponent's move), like EnhancedPatternAI.
+BOTS = {
+    'full': lambda rng: EnhancedPatternAI(rng=rng),
+    'random': RandomBot,
+    'history_20': lambda rng: EnhancedPatternAI(history_size=20, rng=rng),
+    'history_200': lambda rng: EnhancedPatternAI(history_size=200, rng=rng),
+    'history_1000': lambda rng: EnhancedPatternAI(history_size=1000, rng=rng),
+    'hedge': lambda rng: EnhancedPatternAI(weighting=HedgeWeights(), rng=rng),
+    'decayed': lambda rng: EnhancedPatternAI(weighting=DecayedAccuracy(), rng=rng),
+}
+BOTS.update((f"only_{strategy.name}", single_strategy(strategy.name)) for strategy in DEFAULT_STRATEGIES)
+
+
+def play_match(task):
+    """Play one match; returns (bot a, bot b, a's score, rounds, seconds used by a, seconds used by b)"""
+    a_name, b_name, rounds, seed = task
+    a, b = BOTS[a_name](BlockRNG(seed)), BOTS[b_name](BlockRNG(seed + 1))
+    clock = time.perf_counter
+    a_time = b_time = 0.0
+    score = 0.0
+    for _ in range(rounds):
+        start = clock()
+        a_move = a.get_ai_choice()
+        middle = clock()
+        b_move = b.get_ai_choice()
+        end = clock()
+        a.add_move(b_move)
+        after_a = clock()
+        b.add_move(a_move)
+        a_time += middle - start + after_a - end
+        b_time += end - middle + clock() - after_a
+        result = determine_result(a_move, b_move)
+        score += 1.0 if result == 'win' else 0.5 if result == 'draw' else 0.0
+    return a_name, b_name, score, rounds, a_time, b_time
+
+
+def fit_ratings(results, iterations=200):
+    """Bradley-Terry strengths from {(a, b): [a's score, rounds]}, as Elo ratings around 1500"""
+    bots = sorted({name for pair in results for name in pair})
+    scores = defaultdict(float)
+    games = defaultdict(float)  # (bot, opponent) -> rounds played between them
+    for (a, b), (score, rounds) in results.items():
+        scores[a] += score
+        scores[b] += rounds - score
+        games[a, b] += rounds
+        games[b, a] += rounds
+    # Half a round won and lost against a virtual average opponent keeps
+    # every strength finite even for a bot that never scores
+    strength = dict.fromkeys(bots, 1.0)
+    for _ in range(iterations):
+        updated = {}
+        for bot in bots:
+            denominator = 1.0 / (strength[bot] + 1.0)
+            for other in bots:
+                if games[bot, other]:
+                    denominator += games[bot, other] / (strength[bot] + strength[other])
+            updated[bot] = (scores[bot] + 0.5) / denominator
+        mean_log = sum(math.log(s) for s in updated.values()) / len(bots)
+        strength = {bot: s / math.exp(mean_log) for bot, s in updated.items()}
+    offset = 400 * math.log10(strength[ANCHOR]) if ANCHOR in strength else 0.0
+    return {bot: 1500 + 400 * math.log10(strength[bot]) - offset for bot in bots}
+
+
+def run_tournament(bots, rounds, matches=2, workers=None, seed=0):
+    """Play the round-robin and return a report dict"""
+    tasks = []
+    for a, b in combinations(bots, 2):
+        for index in range(matches):
+            match_seed = random.Random(f"{seed}:{a}:{b}:{index}").getrandbits(64)
+            # Alternate who moves first in the timing loop
+            tasks.append((a, b, rounds, match_seed) if index % 2 == 0 else (b, a, rounds, match_seed))
+
+    results = defaultdict(lambda: [0.0, 0])
+    move_time = defaultdict(float)
+    moves = defaultdict(int)
+
+    def record(output):
+        a, b, score, played, a_time, b_time = output
+        key, a_score = ((a, b), score) if a < b else ((b, a), played - score)
+        results[key][0] += a_score
+        results[key][1] += played
+        move_time[a] += a_time
+        move_time[b] += b_time
+        moves[a] += played
+        moves[b] += played
+
+    start = time.perf_counter()
+    if workers == 1:
+        for output in map(play_match, tasks):
+            record(output)
+    else:
+        with Pool(workers) as pool:
+            for output in pool.imap_unordered(play_match, tasks):
+                record(output)
+    wall = time.perf_counter() - start
+
+    ratings = fit_ratings(results)
+    total_rounds = sum(played for _, played in results.values())
+    table = {}
+    for bot in sorted(bots, key=ratings.get, reverse=True):
+        won = sum(score if a == bot else played - score
+                  for (a, b), (score, played) in results.items() if bot in (a, b))
+        table[bot] = {'elo': ratings[bot], 'score': won / moves[bot], 'us_per_move': move_time[bot] / moves[bot] * 1e6}
+    return {
+        'meta': {'seed': seed, 'rounds': rounds, 'matches_per_pair': matches},
+        'matches': len(tasks),
+        'rounds': total_rounds,
+        'wall_seconds': wall,
+        'rounds_per_second': total_rounds / wall if wall else 0.0,
+        'bots': table,
+    }
+
+
+def format_report(report):
+    lines = [f"{'rank':>4}  {'bot':<22}{'Elo':>7}{'score':>8}{'us/move':>10}"]
+    for rank, (bot, entry) in enumerate(report['bots'].items(), 1):
+        lines.append(f"{rank:>4}  {bot:<22}{entry['elo']:>7.0f}{entry['score']:>8.1%}{entry['us_per_move']:>10.1f}")
+    lines.append(f"{report['matches']} matches, {report['rounds']:,} rounds in {report['wall_seconds']:.1f}s"
+                 f" ({report['rounds_per_second']:,.0f} rounds/s)")
+    return "\n".join(lines)
+
+
+def compare(report, baseline, elo_drop, slowdown):
+    """Print rating and speed changes against a baseline report; return the regressed bots"""
+    regressions = []
+    print(f"{'bot':<22}{'old Elo':>8}{'new Elo':>8}{'change':>8}{'old us':>8}{'new us':>8}{'ratio':>7}")
+    for bot, entry in report['bots'].items():
+        old = baseline['bots'].get(bot)
+        if old is None:
+            continue
+        change = entry['elo'] - old['elo']
+        ratio = entry['us_per_move'] / old['us_per_move'] if old['us_per_move'] else float('inf')
+        flags = []
+        if change < -elo_drop:
+            flags.append("WEAKER")
+        if ratio > slowdown and entry['us_per_move'] - old['us_per_move'] > MIN_SLOWDOWN_US:
+            flags.append("SLOWER")
+        if flags:
+            regressions.append(bot)
+        print(f"{bot:<22}{old['elo']:>8.0f}{entry['elo']:>8.0f}{change:>+8.0f}{old['us_per_move']:>8.1f}"
+              f"{entry['us_per_move']:>8.1f}{ratio:>7.2f}  {' '.join(flags)}".rstrip())
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bots', default=",".join(BOTS), help="comma-separated subset of: " + ", ".join(BOTS))
+    parser.add_argument('--rounds', type=int, default=1000, help="rounds per match")
+    parser.add_argument('--matches', type=int, default=2, help="matches per pair of bots")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the JSON report to this file")
+    parser.add_argument('--compare', help="baseline JSON report to check for regressions")
+    parser.add_argument('--elo-drop', type=float, default=30.0, help="rating loss that counts as a regression")
+    parser.add_argument('--slowdown', type=float, default=1.25,
+                        help="time-per-move ratio above which a bot counts as slower")
+    args = parser.parse_args()
+
+    bots = args.bots.split(",")
+    unknown = [name for name in bots if name not in BOTS]
+    if unknown:
+        parser.error(f"unknown bots: {', '.join(unknown)}")
+    if len(bots) < 2:
+        parser.error("a tournament needs at least two bots")
+
+    report = run_tournament(bots, args.rounds, args.matches, args.workers, args.seed)
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.elo_drop, args.slowdown):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()